@@ -1,18 +1,11 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.auth import Login
 from app.services.AuthService import AuthService
-from app.db.session import SessionLocal
+from app.dependencies import get_async_db
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/login")
-def login(data: Login, db: Session = Depends(get_db)):
-    return AuthService.login(data, db)
+async def login(data: Login, db: AsyncSession = Depends(get_async_db)):
+    return await AuthService.login(data, db)
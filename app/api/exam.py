@@ -1,16 +1,40 @@
-from fastapi import APIRouter ,File ,Form ,UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter ,BackgroundTasks ,Depends ,File ,Form ,Query ,Request ,UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List
-import pdfplumber
-import os 
-import io
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 import logging
-import re
+import json
 from app.services.web_service import extract_text_from_url
-from app.services.gemini_service import generate_questions_stream
+from app.services.gemini_service import generate_questions_stream_async
+from app.services.generation_cache import generation_cache, replay_stream
+from app.services.json_stream import iter_json_objects, stream_questions
 from app.prompts.exam_prompt import exam_prompt
-from app.services.pdf_service import extract_text_from_pdf
+from app.prompts.pdf_prompt import pdf_exam_prompt
+from app.services.fanout_service import (
+    use_fan_out,
+    plan_type_batches,
+    plan_context_batches,
+    batch_note,
+    fan_out_stream,
+)
+from app.services.pdf_service import (
+    extract_text_from_pdf_async,
+    iter_pyq_pages,
+    server_timing_header,
+)
+from app.services.diagram_service import extract_diagrams_async
+from app.services.retrieval_service import select_context
+from app.services.pyq_service import (
+    iter_question_blocks,
+    collect_question_window,
+    parse_question_block,
+)
+from app.prompts.pyq_prompt import pyq_extraction_prompt
+from app.core.config import settings
+from app.dependencies import get_async_db
+from app.services.question_bank import QuestionBank
 router = APIRouter(prefix="/exam", tags=["Exam"])
 
 # Define the request structure
@@ -19,132 +43,150 @@ class ExamRequest(BaseModel):
     difficulty: str = "medium"
     total_questions: int = 10
     q_types: List[str] = ["MCQ"] # Default to standard MCQ
+    variety: bool = False # Serve from a pool of cached papers instead of the same one
+    fan_out: Optional[bool] = None # None = automatic for large exams
+
+# ?format=text streams the raw model output (default), ndjson/sse emit one validated question per line/event
+StreamFormat = Literal["text", "ndjson", "sse"]
+
+def question_response(stream, stream_format: str, headers=None):
+    content, media_type = stream_questions(stream, stream_format)
+    return StreamingResponse(content, media_type=media_type, headers=headers)
 
 @router.post("/generate")
-def generate_exam(request: ExamRequest):
-    # Pass q_types to your prompt generator
-    prompt = exam_prompt(
-        request.topic, 
-        request.difficulty, 
-        request.total_questions, 
+async def generate_exam(
+    request: ExamRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    stream_format: StreamFormat = Query("text", alias="format")
+):
+    # 1. Recently generated identical request (in memory, so checked before the DB)
+    cache_key = generation_cache.key(
+        request.topic,
+        request.difficulty,
+        request.total_questions,
         request.q_types
     )
-    return StreamingResponse(
-        generate_questions_stream(prompt), 
-        media_type="text/plain"
+    cached = generation_cache.get(cache_key, variety=request.variety)
+    if cached is not None:
+        # A repeated request may be a popular one: stock the bank for next time
+        if settings.QUESTION_BANK_ENABLED and QuestionBank.wants_top_up(request.topic, request.difficulty):
+            background_tasks.add_task(
+                QuestionBank.top_up, request.topic, request.difficulty, request.q_types
+            )
+        return question_response(
+            replay_stream(cached),
+            stream_format,
+            headers={"X-Cache": "HIT"}
+        )
+
+    # 2. Pre-generated question bank (milliseconds, topped up in the background)
+    if settings.QUESTION_BANK_ENABLED:
+        try:
+            questions = await QuestionBank.take(
+                db,
+                request.topic,
+                request.difficulty,
+                request.q_types,
+                request.total_questions
+            )
+            top_up = questions is not None and await QuestionBank.needs_top_up(
+                db, request.topic, request.difficulty, request.q_types
+            )
+        except Exception as e:
+            # The bank is an optimization; without the DB, generate live as before
+            logger.warning(f"⚠️ Question bank unavailable, generating live: {e}")
+            await db.rollback()
+            questions = None
+        if questions is not None:
+            if top_up:
+                background_tasks.add_task(
+                    QuestionBank.top_up, request.topic, request.difficulty, request.q_types
+                )
+            return question_response(
+                replay_stream(json.dumps(questions, ensure_ascii=False)),
+                stream_format,
+                headers={"X-Cache": "BANK"}
+            )
+
+    # 3. Live generation
+    if use_fan_out(request.fan_out, request.total_questions):
+        # Large exams: concurrent sub-batches partitioned by q_type
+        batches = plan_type_batches(request.total_questions, request.q_types)
+        stream = fan_out_stream(
+            [
+                exam_prompt(request.topic, request.difficulty, count, types) + batch_note(i, len(batches))
+                for i, (count, types) in enumerate(batches)
+            ],
+            http_request
+        )
+    else:
+        # Pass q_types to your prompt generator
+        prompt = exam_prompt(
+            request.topic, 
+            request.difficulty, 
+            request.total_questions, 
+            request.q_types
+        )
+        stream = generate_questions_stream_async(prompt, http_request)
+
+    return question_response(
+        generation_cache.record(cache_key, stream, request.total_questions, http_request),
+        stream_format,
+        headers={"X-Cache": "MISS"}
     )
 
 
 
 @router.post("/generate-from-pdf")
 async def generate_from_pdf(
+    http_request: Request,
     file: UploadFile = File(...),
     difficulty: str = Form(...),
     total_questions: int = Form(...),
-    q_types: str = Form(...) 
+    q_types: str = Form(...),
+    fan_out: Optional[bool] = Form(None),
+    focus: Optional[str] = Form(None), # Optional topic to steer which passages are used
+    stream_format: StreamFormat = Query("text", alias="format")
 ):
     pdf_bytes = await file.read()
-    context_text = extract_text_from_pdf(pdf_bytes)
-    
-    # MASTER PDF PROMPT: Forces JSON and kills conversational noise
-    pdf_prompt = f"""
-    [SYSTEM INSTRUCTION]: You are a JSON-only generator. No preamble. No conversational text.
-    
-    [CONTEXT]: 
-    {context_text[:1000000]}
-    
-    [TASK]: 
-    Generate exactly {total_questions} questions based ONLY on the context above.
-    Difficulty: {difficulty}
-    Allowed Types: {q_types}
-
-    [OUTPUT RULES]:
-    1. Start your response immediately with '[' and end with ']'.
-    2. Do NOT use markdown code blocks (No ```json).
-    3. Ensure every object has: "type", "question", "options", "answer", "explanation".
-    4. For Figure Logic, use the "matrix" field with Unicode symbols ONLY.
-    """
-    
-    return StreamingResponse(
-        generate_questions_stream(pdf_prompt), 
-        media_type="text/plain"
+    # Parsed in the PDF process pool so the event loop stays free
+    context_text, timings = await extract_text_from_pdf_async(pdf_bytes)
+
+    fanned_out = use_fan_out(fan_out, total_questions)
+    # Each sub-prompt gets its own token budget
+    prompts = -(-total_questions // settings.EXAM_FANOUT_BATCH_SIZE) if fanned_out else 1
+    # Only the most relevant passages (spread across the document) that fit the prompt budget
+    context_text, used, total = await run_in_threadpool(
+        select_context, context_text, settings.RETRIEVAL_TOKEN_BUDGET * prompts, focus
     )
-logger = logging.getLogger(__name__)
-
-def get_diagram_crop(page):
-    """Detects only the actual diagram area by filtering out full-page artifacts."""
-    # We only care about images and vector curves (dice/patterns)
-    visuals = page.images + page.curves
-    
-    # Filter out elements that are likely watermarks or borders 
-    # (e.g., anything wider than 80% of the page or very tiny)
-    valid_visuals = [
-        v for v in visuals 
-        if (v['x1'] - v['x0']) < (page.width * 0.8) and (v['x1'] - v['x0']) > 20
-    ]
+    headers = server_timing_header(timings)
+    if used is not None:
+        headers["X-Context-Passages"] = f"{used}/{total}"
+
+    if fanned_out:
+        # One sub-batch per slice of the selected passages, generated concurrently
+        batches = plan_context_batches(total_questions, context_text)
+        stream = fan_out_stream(
+            [
+                pdf_exam_prompt(chunk, difficulty, count, q_types) + batch_note(i, len(batches))
+                for i, (count, chunk) in enumerate(batches)
+            ],
+            http_request
+        )
+    else:
+        stream = generate_questions_stream_async(
+            pdf_exam_prompt(context_text, difficulty, total_questions, q_types),
+            http_request
+        )
     
-    if valid_visuals:
-        try:
-            x0 = min(obj['x0'] for obj in valid_visuals)
-            top = min(obj['top'] for obj in valid_visuals)
-            x1 = max(obj['x1'] for obj in valid_visuals)
-            bottom = max(obj['bottom'] for obj in valid_visuals)
-            
-            # Tighter padding to avoid catching text below the image
-            padding = 5 
-            bbox = (
-                max(0, x0 - padding), 
-                max(0, top - padding), 
-                min(page.width, x1 + padding), 
-                min(page.height, bottom + padding)
-            )
-            
-            # Check if the cropped area is still too large (e.g., more than half the page)
-            # If it's too big, it's probably not a single diagram
-            if (bottom - top) > (page.height * 0.5):
-                return None
-
-            return page.within_bbox(bbox).to_image(resolution=300)
-        except Exception as e:
-            return None
-    return None
-
-# Ensure the static directory exists for images
-IMG_DIR = "static/exam_images"
-os.makedirs(IMG_DIR, exist_ok=True)
-
-def normalize_text(text: str) -> str:
-    """Cleans extracted PDF text for better LLM parsing."""
-    text = re.sub(r'\n{2,}', '\n', text)
-    text = re.sub(r'[ \t]{2,}', ' ', text)
-    text = re.sub(r'\s+\n', '\n', text)
-    return text.strip()
-
-QUESTION_START_REGEX = re.compile(
-    r'(?m)^(Q\.\d+|\d+[\.\)\s])'
-)
-
-def mark_question_starts(text: str) -> str:
-    """
-    Marks each question with:
-    - @@QUESTION_START@@
-    - @@QIDX:<global_index>@@
-    Works with SSC PDFs where numbering may be 'Q.1', '1.', '1)', or just '1 '
-    """
-    pattern = re.compile(
-        r'(?m)^(?:\s*Q\.\s*|\s*)(\d{1,3})[\.\)]?\s+'
+    return question_response(
+        stream, 
+        stream_format,
+        headers=headers
     )
-
-    counter = 0
-
-    def replacer(match):
-        nonlocal counter
-        counter += 1
-        printed_num = match.group(1)
-        return f"\n@@QUESTION_START@@ @@QIDX:{counter}@@ Q.{printed_num} "
-
-    return pattern.sub(replacer, text)
-
+logger = logging.getLogger(__name__)
 
 # -------------------------------
 # API Endpoint
@@ -152,6 +194,7 @@ def mark_question_starts(text: str) -> str:
 
 @router.post("/api/extract-pyq")
 async def extract_pyq(
+    http_request: Request,
     file: UploadFile = File(...),
     questions_limit: int = Form(20),
     start_at: int = Form(1)
@@ -162,35 +205,24 @@ async def extract_pyq(
     """
 
     pdf_bytes = await file.read()
-    raw_text = ""
+    timings = []
 
     # -------------------------------
-    # PDF TEXT EXTRACTION
+    # STREAMING PDF TEXT EXTRACTION + PRE-SEGMENTATION
     # -------------------------------
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-        for i, page in enumerate(pdf.pages):
-            text = page.extract_text()
-            if not text:
-                continue
-
-            page_text = normalize_text(text)
-            page_text = mark_question_starts(page_text)
-
-            raw_text += f"\n--- PAGE {i + 1} ---\n{page_text}"
-
-    logger.info(
-        f"🚀 PYQ Extraction | Anchor Q.{start_at} | Limit {questions_limit} | Size {len(raw_text)} chars"
+    # Pages come from the content-addressed cache or the PDF process pool,
+    # are split into QIDX-indexed question blocks, and reading stops as soon
+    # as blocks start_at .. start_at+questions_limit are complete.
+    window, detected_numbers = await collect_question_window(
+        iter_question_blocks(iter_pyq_pages(pdf_bytes, timings)),
+        start_at,
+        questions_limit,
     )
 
     # -------------------------------
     # 🔍 DEBUG 1: DETECT QUESTION LABELS
     # -------------------------------
-    detected_numbers = re.findall(
-        r'@@QUESTION_START@@\s*(?:Q\.)?(\d{1,3})\b',
-        raw_text
-    )
-
-    unique_numbers = sorted(set(detected_numbers), key=int)
+    unique_numbers = sorted(set(detected_numbers))
 
     logger.warning(
         f"🧩 Detected question numbers (sample): {unique_numbers[:30]} "
@@ -200,11 +232,10 @@ async def extract_pyq(
     # -------------------------------
     # 🎯 DEBUG 2: CHECK ANCHOR EXISTENCE
     # -------------------------------
-    anchor_pattern = rf'@@QUESTION_START@@\s*@@QIDX:{start_at}@@'
-    anchor_found = re.search(anchor_pattern, raw_text)
+    anchor_found = bool(window)
 
     logger.warning(
-        f"🎯 Anchor @@QUESTION_START@@ Q.{start_at} found: {bool(anchor_found)}"
+        f"🎯 Anchor @@QUESTION_START@@ Q.{start_at} found: {anchor_found}"
     )
 
     # ❌ FAIL LOUDLY IF ANCHOR NOT FOUND
@@ -218,75 +249,86 @@ async def extract_pyq(
         }
 
     # -------------------------------
-    # MASTER EXTRACTION PROMPT (SAFE)
+    # LOCAL RULE-BASED PARSE
     # -------------------------------
-    extraction_prompt = f"""
-[SYSTEM ROLE]
-You are a deterministic competitive-exam question extractor.
-You NEVER explain.
-You NEVER guess.
-You NEVER hallucinate.
-You ONLY extract what explicitly exists.
-
-[TASK]
-Extract exactly {questions_limit} multiple-choice questions starting from
-the FIRST question whose numeric label equals {start_at}.
-
-[QUESTION BOUNDARY — GUARANTEED]
-Every question start is explicitly marked by:
-@@QUESTION_START@@
-
-You MUST treat this marker as the ONLY valid question boundary.
-
-[ANCHOR RULE]
-Begin extraction from the question whose @@QIDX equals {start_at}.
-
-[SEQUENCE RULE]
-Continue extracting subsequent @@QUESTION_START@@ blocks
-until exactly {questions_limit} questions are extracted,
-ignoring section headers and numbering resets.
-
-[INVALID FILTER]
-Ignore any question marker not followed by real question text.
-
-[OPTIONS]
-- Exactly 4 options per question
-- Remove option labels (A/B/1/2)
-- Preserve wording exactly
-
-[ANSWER RULE]
-- Use answer ONLY if explicitly present
-- Otherwise:
-  "answer": ""
-  "explanation": ""
-
-[HARD STOP]
-STOP after exactly {questions_limit} questions.
-
-[OUTPUT — JSON ONLY]
-[
-  {{
-    "question": "Exact question text",
-    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
-    "answer": "",
-    "explanation": ""
-  }}
-]
-
-[DOCUMENT TEXT]
-{raw_text}
-"""
+    # Well-formed "Q.n / four options / Ans" blocks never reach the LLM
+    targets = window[:questions_limit]
+    parsed = [parse_question_block(block) for block in targets]
+    failed = [
+        block for block, (question, confidence) in zip(targets, parsed)
+        if question is None or confidence < settings.PYQ_LOCAL_MIN_CONFIDENCE
+    ]
+    avg_confidence = sum(confidence for _, confidence in parsed) / len(parsed)
+    headers = {
+        **server_timing_header(timings),
+        "X-Local-Parse-Confidence": f"{avg_confidence:.2f}",
+    }
+
+    logger.info(
+        f"🚀 PYQ Extraction | Anchor Q.{start_at} | Limit {questions_limit} | "
+        f"Parsed locally {len(targets) - len(failed)}/{len(targets)} | "
+        f"Avg confidence {avg_confidence:.2f}"
+    )
+
+    if not failed:
+        return JSONResponse(
+            [question for question, _ in parsed],
+            headers=headers
+        )
+
+    # -------------------------------
+    # LLM FALLBACK (UNPARSED BLOCKS ONLY)
+    # -------------------------------
+    # Only the failed blocks go to the model, each tagged with its QIDX
+    extraction_prompt = pyq_extraction_prompt(
+        [block["qidx"] for block in failed],
+        "\n\n".join(block["text"] for block in failed)
+    )
 
     logger.info(f"📦 Prompt size sent to LLM: {len(extraction_prompt)} chars")
 
+    async def merged_stream():
+        # The response is one JSON array, so wait for the model and slot its
+        # questions back in by the QIDX each one echoes. Parsing object by object
+        # keeps every complete question even if the output is fenced or truncated.
+        failed_ids = {block["qidx"] for block in failed}
+        llm_questions = {}
+        async for obj in iter_json_objects(
+            generate_questions_stream_async(extraction_prompt, http_request)
+        ):
+            qidx = obj.pop("qidx", None)
+            if isinstance(qidx, str) and qidx.strip().isdigit():
+                qidx = int(qidx)
+            if isinstance(qidx, int) and qidx in failed_ids and qidx not in llm_questions:
+                llm_questions[qidx] = obj
+            else:
+                logger.warning(f"⚠️ Dropping LLM question with unexpected qidx {qidx!r}")
+
+        missing = failed_ids - llm_questions.keys()
+        if missing:
+            logger.warning(f"⚠️ LLM returned no question for QIDX {sorted(missing)}")
+
+        merged = []
+        for block, (question, _) in zip(targets, parsed):
+            if block["qidx"] in failed_ids:
+                question = llm_questions.get(block["qidx"])
+            if question is not None:
+                merged.append(question)
+        yield json.dumps(merged, ensure_ascii=False)
+
     return StreamingResponse(
-        generate_questions_stream(extraction_prompt),
-        media_type="application/json"
+        merged_stream(),
+        media_type="application/json",
+        headers=headers
     )
 
 
 @router.post("/generate-from-web")
-async def generate_from_web(request: ExamRequest): # Reuse your existing Pydantic model
+async def generate_from_web(
+    request: ExamRequest, # Reuse your existing Pydantic model
+    http_request: Request,
+    stream_format: StreamFormat = Query("text", alias="format")
+):
     # 1. Extract text from URL
     try:
         context_text = await extract_text_from_url(request.topic) # Here 'topic' is the URL
@@ -304,9 +346,24 @@ async def generate_from_web(request: ExamRequest): # Reuse your existing Pydanti
     Types: {request.q_types}
 
     [STRICT RULE]: Output ONLY a raw JSON array. Start with '['.
+    Ensure every object has: "type", "question", "options", "answer", "explanation".
     """
     
-    return StreamingResponse(
-        generate_questions_stream(web_prompt), 
-        media_type="text/plain"
-    )
\ No newline at end of file
+    return question_response(
+        generate_questions_stream_async(web_prompt, http_request), 
+        stream_format
+    )
+
+
+@router.post("/extract-diagrams")
+async def extract_diagrams(file: UploadFile = File(...)):
+    """
+    Finds every diagram in the PDF (several per page), renders just those
+    regions and returns their hash-named image URLs in page order.
+    """
+    pdf_bytes = await file.read()
+    diagrams, timings = await extract_diagrams_async(pdf_bytes)
+    return JSONResponse(
+        {"count": len(diagrams), "diagrams": diagrams},
+        headers=server_timing_header(timings)
+    )
@@ -1,25 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from sqlalchemy import func
 # Import the models and schemas modules
 from app import models, schemas
-from app.db.session import SessionLocal
+from app.dependencies import get_async_db
+from app.repositories.stats_repo import StatsRepository
+from app.repositories.result_repo import ResultRepository
+from app.core.config import settings
+from datetime import datetime
+import json
 
 # Remove this line to avoid confusion:
 # from app.schemas.result import ResultCreate, ProgressResponse 
 
 router = APIRouter()
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 @router.post("/save-result")
-def save_result(result: schemas.ResultCreate, db: Session = Depends(get_db)):
+async def save_result(result: schemas.ResultCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Saves a completed exam result to the PostgreSQL database.
     """
@@ -37,65 +36,185 @@ def save_result(result: schemas.ResultCreate, db: Session = Depends(get_db)):
             sectional_breakdown=result.sectional_breakdown
         )
         db.add(db_result)
-        db.commit()
-        db.refresh(db_result)
+        await db.flush()  # assigns id/created_at
+        # Keep the per-user aggregate in the same transaction
+        await StatsRepository.apply_result(db, db_result)
+        await db.commit()
         return {"status": "success", "result_id": db_result.id}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         # Log the error for debugging
         print(f"Database Error: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+async def iter_bulk_items(request: Request):
+    """
+    Yields (index, item) from a JSON array body, or line by line from an
+    NDJSON body as it streams in. Unparseable NDJSON lines yield a ValueError.
+    """
+    if "ndjson" not in request.headers.get("content-type", ""):
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        for index, item in enumerate(items):
+            yield index, item
+        return
+
+    index = 0
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    yield index, json.loads(line)
+                except ValueError as e:
+                    yield index, e
+                index += 1
+    if buffer.strip():
+        try:
+            yield index, json.loads(buffer)
+        except ValueError as e:
+            yield index, e
+
+
+async def insert_result_chunk(db, chunk):
+    """
+    Inserts one chunk of validated results with a single multi-row INSERT and
+    updates each affected user's aggregate, all in one transaction.
+    Returns [(index, result_id), ...].
+    """
+    now = datetime.utcnow()
+    rows = [{**result.model_dump(), "created_at": now} for _, result in chunk]
+    try:
+        ids = await ResultRepository.bulk_insert(db, rows)
+
+        by_user = {}
+        for row in rows:
+            by_user.setdefault(row["user_id"], []).append(models.ExamResult(**row))
+        # Lock aggregate rows in a stable order so concurrent imports cannot deadlock
+        for user_id in sorted(by_user):
+            await StatsRepository.apply_results(db, user_id, by_user[user_id])
+
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return [(index, result_id) for (index, _), result_id in zip(chunk, ids)]
+
+
+@router.post("/save-results")
+async def save_results(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Bulk version of /save-result for offline test centers.
+    Accepts a JSON array or an NDJSON stream (Content-Type: application/x-ndjson)
+    of ResultCreate objects. Each item is validated on its own; valid items are
+    inserted in chunks of STATS_BULK_CHUNK and per-item errors are reported.
+    """
+    saved = []
+    errors = []
+    chunk = []
+
+    async def flush(chunk):
+        try:
+            saved.extend(await insert_result_chunk(db, chunk))
+        except Exception as e:
+            print(f"Database Error: {e}")
+            errors.extend({"index": index, "errors": ["Database error, item not saved"]} for index, _ in chunk)
+
+    async for index, item in iter_bulk_items(request):
+        if isinstance(item, ValueError):
+            errors.append({"index": index, "errors": [f"Invalid JSON: {item}"]})
+            continue
+        try:
+            chunk.append((index, schemas.ResultCreate.model_validate(item)))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors(include_url=False, include_context=False, include_input=False)})
+            continue
+        if len(chunk) >= settings.STATS_BULK_CHUNK:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+
+    return {
+        "status": "success" if not errors else ("partial" if saved else "failed"),
+        "inserted": len(saved),
+        "results": [{"index": index, "result_id": result_id} for index, result_id in saved],
+        "errors": errors
+    }
+
 @router.get("/progress/{user_id}", response_model=schemas.ProgressResponse)
-def get_progress(user_id: str, db: Session = Depends(get_db)):
+async def get_progress(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Calculates analytics for the Progress Tab.
     """
-    results = db.query(models.ExamResult).filter(
-        models.ExamResult.user_id == user_id
-    ).order_by(models.ExamResult.created_at.desc()).all()
+    stats = await StatsRepository.get(db, user_id)
+
+    if not stats:
+        # Not backfilled yet: aggregate in SQL and fetch only the rows we plot
+        total_mocks, avg_score, avg_accuracy = await ResultRepository.summary(db, user_id)
+        if total_mocks == 0:
+            raise HTTPException(status_code=404, detail="No exam history found.")
+        latest = await ResultRepository.latest(db, user_id, 7)
+        return {
+            "avg_score": round(avg_score, 2),
+            "avg_accuracy": round(avg_accuracy, 2),
+            "latest_sectional": latest[0].sectional_breakdown,
+            "weekly_trend": [r.score for r in reversed(latest)],
+            "total_mocks": total_mocks
+        }
 
-    if not results:
+    if stats.total_mocks == 0:
         raise HTTPException(status_code=404, detail="No exam history found.")
 
-    # Calculations
-    total_exams = len(results)
-    avg_score = sum(r.score for r in results) / total_exams
-    avg_accuracy = sum(r.accuracy for r in results) / total_exams
-    latest_sectional = results[0].sectional_breakdown
-    
     # Chronological trend for the graph
-    trend_data = [r.score for r in results[:7]][::-1]
+    trend_data = [r["score"] for r in stats.recent[-7:]]
 
     return {
-        "avg_score": round(avg_score, 2),
-        "avg_accuracy": round(avg_accuracy, 2),
-        "latest_sectional": latest_sectional,
+        "avg_score": round(stats.score_sum / stats.total_mocks, 2),
+        "avg_accuracy": round(stats.accuracy_sum / stats.total_mocks, 2),
+        "latest_sectional": stats.latest_sectional,
         "weekly_trend": trend_data,
-        "total_mocks": total_exams
+        "total_mocks": stats.total_mocks
     }
 
 @router.get("/dashboard-stats/{user_id}")
-def get_dashboard_stats(user_id: str, db: Session = Depends(get_db)):
-    results = db.query(models.ExamResult).filter(models.ExamResult.user_id == user_id).all()
+async def get_dashboard_stats(user_id: str, db: AsyncSession = Depends(get_async_db)):
+    stats = await StatsRepository.get(db, user_id)
+
+    if not stats:
+        # Not backfilled yet: aggregate in SQL and fetch only the rows we plot
+        total_mocks, avg_score, avg_accuracy = await ResultRepository.summary(db, user_id)
+        if total_mocks == 0:
+            return {"msg": "No data found"}
+        latest = await ResultRepository.latest(db, user_id, 10)
+        return {
+            "total_mocks": total_mocks,
+            "avg_score": round(avg_score, 2),
+            "avg_accuracy": round(avg_accuracy, 2),
+            "chart_data": [
+                {"date": r.created_at.strftime("%d %b"), "score": r.score}
+                for r in reversed(latest)
+            ]
+        }
     
-    if not results:
+    if stats.total_mocks == 0:
         return {"msg": "No data found"}
 
-    # Calculate Aggregates
-    total_mocks = len(results)
-    avg_score = sum(r.score for r in results) / total_mocks
-    avg_accuracy = sum(r.accuracy for r in results) / total_mocks
-    
     # Prepare data for a Line Chart (Last 10 mocks)
     chart_data = [
-        {"date": r.created_at.strftime("%d %b"), "score": r.score} 
-        for r in results[-10:]
+        {"date": datetime.fromisoformat(r["date"]).strftime("%d %b"), "score": r["score"]} 
+        for r in stats.recent[-10:]
     ]
 
     return {
-        "total_mocks": total_mocks,
-        "avg_score": round(avg_score, 2),
-        "avg_accuracy": round(avg_accuracy, 2),
+        "total_mocks": stats.total_mocks,
+        "avg_score": round(stats.score_sum / stats.total_mocks, 2),
+        "avg_accuracy": round(stats.accuracy_sum / stats.total_mocks, 2),
         "chart_data": chart_data
     }
\ No newline at end of file
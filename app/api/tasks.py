@@ -1,28 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+from app.core.config import settings
 from app.core.deps import get_current_user_id
-from app.db.session import SessionLocal
+from app.core.pagination import encode_cursor, decode_cursor
+from app.dependencies import get_async_db
 from app.models.tasks import Task
+from app.repositories.task_repo import TaskRepository
+from app.services.task_events import notify_task_changed
 from app.schemas.tasks import TaskCreate, TaskResponse, TaskUpdate
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # -----------------------
 # Create Task
 # -----------------------
 
 @router.post("/create-task", response_model=TaskResponse)
-def create_task(
+async def create_task(
     data: TaskCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user_id) # The logic above runs here
 ):
     task = Task(
@@ -31,28 +30,57 @@ def create_task(
         user_id=user_id # This 'user_id' is now the integer from the token
     )
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await db.flush()
+    # Lets the reminder scheduler pick the task up without waiting for its next sweep
+    await notify_task_changed(db, task.id)
+    await db.commit()
+    await db.refresh(task)
     return task
 # -----------------------
 # List Tasks
 # -----------------------
+# Pages through the caller's tasks by (due_date, id), undated tasks last.
+# Pass the X-Next-Cursor response header back as ?cursor= for the next page;
+# the header is absent on the last page.
 @router.get("/get-task", response_model=List[TaskResponse])
-def list_tasks(db: Session = Depends(get_db)):
-    return db.query(Task).all()
+async def list_tasks(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE, ge=1, le=settings.PAGE_SIZE_MAX),
+    status: Optional[int] = None,
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    after = None
+    if cursor:
+        try:
+            after = TaskRepository.parse_cursor_values(decode_cursor(cursor, 2))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = await TaskRepository.page(
+        db, user_id, limit, after=after, status=status, due_from=due_from, due_to=due_to
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(*TaskRepository.cursor_values(rows[-1]))
+    return rows
 
 # -----------------------
 # Update Task
 # -----------------------
 @router.post("/update-task/{task_id}", response_model=TaskResponse)
-def update_task(
+async def update_task(
     task_id: int, 
     data: TaskUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user_id) # Added protection
 ):
     # Important: Only let users update their OWN tasks
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+    result = await db.execute(select(Task).where(Task.id == task_id, Task.user_id == user_id))
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found or unauthorized")
@@ -64,6 +92,7 @@ def update_task(
     if data.due_date is not None: # Changed from due_date to match create_task
         task.due_date = data.due_date
 
-    db.commit()
-    db.refresh(task)
+    await notify_task_changed(db, task.id)
+    await db.commit()
+    await db.refresh(task)
     return task
@@ -1,20 +1,89 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+import csv
+import io
+import json
+import logging
 
-from app.db.session import SessionLocal
-from app.models.user import UserTable
+from app.core.config import settings
+from app.core.deps import get_admin_user_id
+from app.core.pagination import encode_cursor, decode_cursor
+from app.db.session import AsyncSessionLocal
+from app.dependencies import get_async_db
+from app.repositories.user_repo import UserRepository, USER_COLUMNS
 from app.schemas.auth import UserOut
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/users", tags=["Users"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+EXPORT_FIELDS = [column.key for column in USER_COLUMNS]
+
+# Pass the X-Next-Cursor response header back as ?cursor= for the next page
 @router.get("/", response_model=List[UserOut])
-def get_all_users(db: Session = Depends(get_db)):
-    users = db.query(UserTable).all()
+async def get_all_users(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE, ge=1, le=settings.PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_async_db)
+):
+    after_id = None
+    if cursor:
+        try:
+            (after_id,) = decode_cursor(cursor, 1)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not isinstance(after_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    users = await UserRepository.page(db, limit, after_id)
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(users[-1]["id"])
     return users
+
+
+def _export_ndjson(rows):
+    return "".join(
+        json.dumps(UserOut.model_validate(row).model_dump(mode="json"), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _export_csv(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    if header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow(UserOut.model_validate(row).model_dump(mode="json"))
+    return buffer.getvalue()
+
+
+async def _export_rows(export_format: str):
+    # Own session: the stream outlives the request's dependency scope
+    async with AsyncSessionLocal() as db:
+        if export_format == "csv":
+            yield _export_csv([], header=True)
+        exported = 0
+        async for rows in UserRepository.stream_all(db, settings.USERS_EXPORT_CHUNK):
+            yield _export_csv(rows) if export_format == "csv" else _export_ndjson(rows)
+            exported += len(rows)
+        logger.info(f"📤 Exported {exported} user(s) as {export_format}")
+
+
+# Full-table dump for analytics, streamed in constant memory. Admins only (ADMIN_USER_IDS).
+@router.get("/export")
+async def export_users(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    admin_id: int = Depends(get_admin_user_id)
+):
+    logger.info(f"📤 User export requested by admin {admin_id}")
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'}
+    )
@@ -10,18 +10,124 @@ load_dotenv(dotenv_path=BASE_DIR / ".env")
 
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Connection pool (applies to both the sync and async engines)
+    DB_POOL_SIZE:int=int(os.getenv("DB_POOL_SIZE",10))
+    DB_MAX_OVERFLOW:int=int(os.getenv("DB_MAX_OVERFLOW",20))
+    DB_POOL_TIMEOUT:int=int(os.getenv("DB_POOL_TIMEOUT",30))
+    DB_POOL_RECYCLE:int=int(os.getenv("DB_POOL_RECYCLE",1800))
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = os.getenv("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60)
     )
+    # Argon2 cost (passlib's defaults); changing them rehashes each password on its next login
+    ARGON2_TIME_COST:int=int(os.getenv("ARGON2_TIME_COST",3))
+    ARGON2_MEMORY_COST:int=int(os.getenv("ARGON2_MEMORY_COST",65536)) # KiB
+    ARGON2_PARALLELISM:int=int(os.getenv("ARGON2_PARALLELISM",4))
+    # Dedicated password-hashing threads, and how many logins may wait for them before 429s
+    PASSWORD_POOL_WORKERS:int=int(os.getenv("PASSWORD_POOL_WORKERS",min(4, os.cpu_count() or 1)))
+    PASSWORD_POOL_MAX_PENDING:int=int(os.getenv("PASSWORD_POOL_MAX_PENDING",64))
+    # "jose" (python-jose) or "pyjwt" (faster, optional dependency)
+    AUTH_JWT_BACKEND:str=os.getenv("AUTH_JWT_BACKEND","jose").lower()
+    # Verified tokens remembered until their exp (0 disables the cache)
+    AUTH_TOKEN_CACHE_SIZE:int=int(os.getenv("AUTH_TOKEN_CACHE_SIZE",10000))
+    # User ids allowed on admin-only endpoints such as /users/export (empty = nobody)
+    ADMIN_USER_IDS:list=[int(i) for i in os.getenv("ADMIN_USER_IDS","").split(",") if i.strip()]
+    # Keyset-paginated listings (?limit= default and ceiling)
+    PAGE_SIZE:int=int(os.getenv("PAGE_SIZE",50))
+    PAGE_SIZE_MAX:int=int(os.getenv("PAGE_SIZE_MAX",200))
+    USERS_EXPORT_CHUNK:int=int(os.getenv("USERS_EXPORT_CHUNK",1000))
     EMAIL_HOST:str=os.getenv("EMAIL_HOST")
     EMAIL_PORT:str=os.getenv("EMAIL_PORT")
     EMAIL_USERNAME:str=os.getenv("EMAIL_USERNAME")
     EMAIL_PASSWORD:str=os.getenv("EMAIL_PASSWORD")
     EMAIL_FROM:str =os.getenv("EMAIL_FROM")
+    # STARTTLS before login; turn off for a local plain SMTP stand-in (e.g. aiosmtpd)
+    EMAIL_USE_TLS:bool=os.getenv("EMAIL_USE_TLS","true").lower()=="true"
+    # Persistent SMTP connections, and messages sent concurrently over them
+    EMAIL_POOL_SIZE:int=int(os.getenv("EMAIL_POOL_SIZE",4))
+    EMAIL_TIMEOUT_SECONDS:int=int(os.getenv("EMAIL_TIMEOUT_SECONDS",30))
     REMINDER_WINDOW_MINUTES:int=int(os.getenv("REMINDER_WINDOW_MINUTES",10))
+    # Tasks each reminder worker claims (FOR UPDATE SKIP LOCKED) per round trip
+    REMINDER_BATCH_SIZE:int=int(os.getenv("REMINDER_BATCH_SIZE",100))
+    # First retry delay after a failed reminder send; doubles on each further failure
+    REMINDER_RETRY_SECONDS:int=int(os.getenv("REMINDER_RETRY_SECONDS",60))
+    # Reminders fire on schedule/LISTEN events; this slow sweep only reconciles missed ones
+    REMINDER_RECONCILE_SECONDS:int=int(os.getenv("REMINDER_RECONCILE_SECONDS",900))
     GEMINI_API_KEY:str=os.getenv("GEMINI_API_KEY")
+    GEMINI_TIMEOUT_MS:int=int(os.getenv("GEMINI_TIMEOUT_MS",120000))
+    GEMINI_MAX_CONNECTIONS:int=int(os.getenv("GEMINI_MAX_CONNECTIONS",100))
+    GEMINI_MAX_KEEPALIVE:int=int(os.getenv("GEMINI_MAX_KEEPALIVE",20))
+    # /generate-from-web fetching: shared client limits, download cap, text budget and URL cache
+    WEB_TIMEOUT_SECONDS:float=float(os.getenv("WEB_TIMEOUT_SECONDS",15))
+    WEB_CONNECT_TIMEOUT_SECONDS:float=float(os.getenv("WEB_CONNECT_TIMEOUT_SECONDS",5))
+    WEB_MAX_CONNECTIONS:int=int(os.getenv("WEB_MAX_CONNECTIONS",50))
+    WEB_MAX_KEEPALIVE:int=int(os.getenv("WEB_MAX_KEEPALIVE",10))
+    WEB_MAX_BYTES:int=int(os.getenv("WEB_MAX_BYTES",2*1024*1024))
+    WEB_TEXT_BUDGET:int=int(os.getenv("WEB_TEXT_BUDGET",12000))
+    WEB_CACHE_MAX_ENTRIES:int=int(os.getenv("WEB_CACHE_MAX_ENTRIES",256))
+    # Stream pages through the stdlib parser and stop once WEB_TEXT_BUDGET is filled (instead of BeautifulSoup)
+    WEB_FAST_HTML:bool=os.getenv("WEB_FAST_HTML","false").lower()=="true"
+
+    # Number of recent results kept per user for trend charts
+    STATS_TREND_SIZE:int=int(os.getenv("STATS_TREND_SIZE",10))
+    # Rows per multi-row INSERT in /api/stats/save-results
+    STATS_BULK_CHUNK:int=int(os.getenv("STATS_BULK_CHUNK",500))
+
+    # PDF text cache (keyed by SHA-256 of the uploaded bytes)
+    PDF_CACHE_MAX_ENTRIES:int=int(os.getenv("PDF_CACHE_MAX_ENTRIES",64))
+    PDF_CACHE_DISK:bool=os.getenv("PDF_CACHE_DISK","false").lower()=="true"
+    PDF_CACHE_DIR:str=os.getenv("PDF_CACHE_DIR",str(BASE_DIR / "static" / "pdf_cache"))
+
+    # PDF parsing process pool
+    PDF_POOL_WORKERS:int=int(os.getenv("PDF_POOL_WORKERS",os.cpu_count() or 2))
+    PDF_POOL_MAX_PENDING:int=int(os.getenv("PDF_POOL_MAX_PENDING",16))
+    PDF_STREAM_PAGES_PER_TASK:int=int(os.getenv("PDF_STREAM_PAGES_PER_TASK",4))
+    # Diagram extraction: render resolution, where hash-named images go, and region clustering (PDF points)
+    DIAGRAM_DPI:int=int(os.getenv("DIAGRAM_DPI",200))
+    DIAGRAM_DIR:str=os.getenv("DIAGRAM_DIR",str(BASE_DIR / "static" / "exam_images"))
+    DIAGRAM_MERGE_GAP:float=float(os.getenv("DIAGRAM_MERGE_GAP",12))
+    DIAGRAM_MIN_SIZE:float=float(os.getenv("DIAGRAM_MIN_SIZE",20))
+    DIAGRAM_MAX_ITEMS:int=int(os.getenv("DIAGRAM_MAX_ITEMS",5000))
+    # /generate-from-pdf context selection (BM25 over passages instead of the first N characters)
+    RETRIEVAL_TOKEN_BUDGET:int=int(os.getenv("RETRIEVAL_TOKEN_BUDGET",24000)) # per prompt
+    RETRIEVAL_CHARS_PER_TOKEN:int=int(os.getenv("RETRIEVAL_CHARS_PER_TOKEN",4))
+    RETRIEVAL_PASSAGE_CHARS:int=int(os.getenv("RETRIEVAL_PASSAGE_CHARS",1500))
+    RETRIEVAL_SECTIONS:int=int(os.getenv("RETRIEVAL_SECTIONS",8))
+    RETRIEVAL_MIN_RELATIVE_SCORE:float=float(os.getenv("RETRIEVAL_MIN_RELATIVE_SCORE",0.5)) # of the best passage, for coverage picks
+    RETRIEVAL_KEY_TERMS:int=int(os.getenv("RETRIEVAL_KEY_TERMS",64))
+    RETRIEVAL_INDEX_CACHE:int=int(os.getenv("RETRIEVAL_INDEX_CACHE",16))
+    # WebP copies and thumbnails generated next to each diagram PNG
+    DIAGRAM_WEBP_QUALITY:int=int(os.getenv("DIAGRAM_WEBP_QUALITY",80))
+    DIAGRAM_THUMB_SIZE:int=int(os.getenv("DIAGRAM_THUMB_SIZE",320))
+
+    # /exam/generate response cache
+    EXAM_CACHE_MAX_KEYS:int=int(os.getenv("EXAM_CACHE_MAX_KEYS",512))
+    EXAM_CACHE_TTL_SECONDS:int=int(os.getenv("EXAM_CACHE_TTL_SECONDS",6*60*60))
+    EXAM_CACHE_VARIETY_POOL:int=int(os.getenv("EXAM_CACHE_VARIETY_POOL",5))
+    EXAM_CACHE_REPLAY_CHUNK:int=int(os.getenv("EXAM_CACHE_REPLAY_CHUNK",256))
+
+    # Parallel fan-out for large exams
+    EXAM_FANOUT_MIN_QUESTIONS:int=int(os.getenv("EXAM_FANOUT_MIN_QUESTIONS",30))
+    EXAM_FANOUT_BATCH_SIZE:int=int(os.getenv("EXAM_FANOUT_BATCH_SIZE",10))
+    EXAM_FANOUT_CONCURRENCY:int=int(os.getenv("EXAM_FANOUT_CONCURRENCY",4))
+    EXAM_DEDUP_THRESHOLD:float=float(os.getenv("EXAM_DEDUP_THRESHOLD",0.8))
+
+    # Pre-generated question bank. Off by default: turn it on once the bank worker has
+    # stocked it, since every generation then waits on the database first
+    QUESTION_BANK_ENABLED:bool=os.getenv("QUESTION_BANK_ENABLED","false").lower()=="true"
+    QUESTION_BANK_TOPICS:list=[t.strip() for t in os.getenv("QUESTION_BANK_TOPICS","").split(",") if t.strip()]
+    QUESTION_BANK_DIFFICULTIES:list=[d.strip().lower() for d in os.getenv("QUESTION_BANK_DIFFICULTIES","easy,medium,hard").split(",") if d.strip()]
+    QUESTION_BANK_TYPES:list=[t.strip() for t in os.getenv("QUESTION_BANK_TYPES","MCQ").split(",") if t.strip()]
+    QUESTION_BANK_TARGET_STOCK:int=int(os.getenv("QUESTION_BANK_TARGET_STOCK",200))
+    QUESTION_BANK_LOW_WATER:int=int(os.getenv("QUESTION_BANK_LOW_WATER",50))
+    QUESTION_BANK_BATCH_SIZE:int=int(os.getenv("QUESTION_BANK_BATCH_SIZE",20))
+    QUESTION_BANK_INTERVAL_SECONDS:int=int(os.getenv("QUESTION_BANK_INTERVAL_SECONDS",300))
+    # Repeat requests before a topic outside QUESTION_BANK_TOPICS gets stocked (and kept stocked)
+    QUESTION_BANK_DEMAND_THRESHOLD:int=int(os.getenv("QUESTION_BANK_DEMAND_THRESHOLD",5))
+
+    # Blocks parsed locally below this confidence are sent to the LLM instead
+    PYQ_LOCAL_MIN_CONFIDENCE:float=float(os.getenv("PYQ_LOCAL_MIN_CONFIDENCE",0.8))
 
 
 settings = Settings()
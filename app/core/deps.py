@@ -1,33 +1,63 @@
+import time
+from cachetools import TLRUCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 from app.core.config import settings
+from app.core.security import decode_token, TokenError
 
 # This tells FastAPI to look for the token in the "Authorization" header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+# Verified token -> (user_id, exp). Each entry expires with its token, so a
+# cached token is never accepted past its `exp`.
+_verified_tokens = TLRUCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttu=lambda token, value, now: value[1],
+    timer=time.time
+)
+
+# async: runs on the event loop instead of taking a threadpool hop on every request
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    cached = _verified_tokens.get(token)
+    if cached is not None:
+        return cached[0]
+
     try:
         # Decode the token using the SAME secret and algorithm
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        
-        user_id: str = payload.get("sub")
-        
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, 
-                detail="Token missing user information"
-            )
-            
-        return int(user_id)
-
-    except JWTError as e:
+        payload = decode_token(token)
+    except TokenError as e:
         # This catches expired tokens OR invalid signatures
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Token is invalid or expired: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+    user_id: str = payload.get("sub")
+
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, 
+            detail="Token missing user information"
+        )
+
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token missing user information"
+        )
+
+    exp = payload.get("exp")
+    if settings.AUTH_TOKEN_CACHE_SIZE and isinstance(exp, (int, float)):
+        _verified_tokens[token] = (user_id, exp)
+    return user_id
+
+
+async def get_admin_user_id(user_id: int = Depends(get_current_user_id)) -> int:
+    if user_id not in settings.ADMIN_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return user_id
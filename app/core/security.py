@@ -29,14 +29,28 @@
 
 
 from passlib.context import CryptContext
-from jose import jwt
+from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
+import logging
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Optional faster verifier (PyJWT, `pip install pyjwt`); tokens are interchangeable with python-jose's
+pyjwt = None
+if settings.AUTH_JWT_BACKEND == "pyjwt":
+    try:
+        import jwt as pyjwt
+    except ImportError:
+        logger.warning("⚠️ AUTH_JWT_BACKEND=pyjwt but PyJWT is not installed; using python-jose")
+
 # ✅ Use ONLY argon2
 pwd_context = CryptContext(
     schemes=["argon2"],
-    deprecated="auto"
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM
 )
 
 def get_password_hash(password: str) -> str:
@@ -45,6 +59,10 @@ def get_password_hash(password: str) -> str:
 def verify_password(raw_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(raw_password, hashed_password)
 
+def verify_and_update_password(raw_password: str, hashed_password: str):
+    """(valid, new_hash). new_hash is set when the stored hash uses outdated Argon2 parameters."""
+    return pwd_context.verify_and_update(raw_password, hashed_password)
+
 def create_token(user_id: int) -> str:
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -57,3 +75,21 @@ def create_token(user_id: int) -> str:
     }
 
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+class TokenError(Exception):
+    """The token is malformed, badly signed or expired."""
+
+
+def decode_token(token: str) -> dict:
+    """Verifies signature and expiry with the configured backend and returns the claims."""
+    try:
+        if pyjwt is not None:
+            return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError as e:
+        raise TokenError(str(e)) from e
+    except Exception as e:
+        if pyjwt is not None and isinstance(e, pyjwt.PyJWTError):
+            raise TokenError(str(e)) from e
+        raise
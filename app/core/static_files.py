@@ -0,0 +1,33 @@
+import os
+import re
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# "<32 hex chars of the content's SHA-256>.<ext>", as written by diagram_service.store_image
+HASHED_NAME_REGEX = re.compile(r"^([0-9a-f]{32})\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles for content-addressed assets. A hash-named file can never
+    change, so it is served with a year-long immutable Cache-Control and a
+    strong ETag taken from the hash (identical across replicas, unlike
+    Starlette's mtime-based one). Anything else must revalidate on each use.
+    ETag/If-None-Match 304s and Range requests come from Starlette.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        match = HASHED_NAME_REGEX.match(os.path.basename(full_path))
+        if match:
+            headers = {"cache-control": IMMUTABLE_CACHE_CONTROL, "etag": f'"{match.group(1)}"'}
+        else:
+            headers = {"cache-control": "no-cache"}
+
+        # FileResponse only fills in etag/last-modified when they are not already set
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
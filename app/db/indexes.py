@@ -0,0 +1,27 @@
+from app.models.result import ExamResult
+from app.models.tasks import Task
+from app.models.user import UserTable  # noqa: F401  (resolves Task.user)
+
+# Indexes added after their table was first deployed. create_all() skips
+# tables that already exist, so these are created explicitly with
+# checkfirst on every startup; a no-op once they are present.
+ADDED_INDEXES = {
+    ExamResult: ["ix_exam_results_user_created"],
+    Task: ["ix_tasks_user_due_id", "ix_tasks_user_status_due_id", "ix_tasks_reminder_due"],
+}
+
+
+def ensure_indexes(sync_conn):
+    for model, index_names in ADDED_INDEXES.items():
+        for index in model.__table__.indexes:
+            if index.name in index_names:
+                index.create(bind=sync_conn, checkfirst=True)
+
+
+if __name__ == "__main__":
+    # One-off migration: python -m app.db.indexes
+    from app.db.session import engine
+
+    with engine.begin() as conn:
+        ensure_indexes(conn)
+    print("✅ Indexes in place.")
@@ -1,5 +1,6 @@
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, AsyncSessionLocal
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 def get_db():
     db: Session = SessionLocal()
@@ -7,3 +8,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    db: AsyncSession = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -1,10 +1,5 @@
-from passlib.context import CryptContext
-
-# ✅ Use ONLY argon2
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto"
-)
+# Same context (and Argon2 parameters) the API verifies with
+from app.core.security import pwd_context
 
 def generate_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from sqlalchemy import select
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.result import ExamResult
+from app.models.user_stats import UserStats
+from app.repositories.stats_repo import StatsRepository
+
+# Configure logging to show time and message
+logging.basicConfig(
+    level=logging.INFO, 
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def backfill_user_stats_async():
+    """Builds user_stats rows for every user that already has exam results. Safe to re-run."""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: UserStats.__table__.create(bind=sync_conn, checkfirst=True))
+
+    async with AsyncSessionLocal() as db:
+        try:
+            user_ids = (await db.scalars(select(ExamResult.user_id).distinct())).all()
+            logger.info(f"📊 Backfilling stats for {len(user_ids)} user(s)...")
+
+            for i, user_id in enumerate(user_ids, start=1):
+                await StatsRepository.rebuild(db, user_id)
+                await db.commit()
+                if i % 500 == 0:
+                    logger.info(f"   {i}/{len(user_ids)} done")
+
+            logger.info("✅ Backfill complete.")
+        except Exception as e:
+            logger.error(f"❌ Backfill failed: {str(e)}")
+            await db.rollback()
+            raise
+    await async_engine.dispose()
+
+
+def backfill_user_stats():
+    asyncio.run(backfill_user_stats_async())
+
+if __name__ == "__main__":
+    backfill_user_stats()
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.question_bank import QuestionBank
+
+# Configure logging to show time and message
+logging.basicConfig(
+    level=logging.INFO, 
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def popular_combinations():
+    """Configured topics × difficulties × types, plus banked combinations that are actually being served."""
+    combos = {
+        (QuestionBank.normalize_topic(topic), difficulty, q_type)
+        for topic in settings.QUESTION_BANK_TOPICS
+        for difficulty in settings.QUESTION_BANK_DIFFICULTIES
+        for q_type in settings.QUESTION_BANK_TYPES
+    }
+    async with AsyncSessionLocal() as db:
+        combos.update(tuple(row) for row in await QuestionBank.known_combinations(db, settings.QUESTION_BANK_DEMAND_THRESHOLD))
+    return sorted(combos)
+
+
+async def question_bank_loop():
+    while True:
+        try:
+            combos = await popular_combinations()
+            logger.info(f"Heartbeat: checking stock for {len(combos)} combination(s)")
+            for topic, difficulty, q_type in combos:
+                await QuestionBank.top_up(topic, difficulty, [q_type])
+        except Exception as e:
+            logger.error(f"❌ Critical error in question bank loop: {str(e)}")
+
+        await asyncio.sleep(settings.QUESTION_BANK_INTERVAL_SECONDS)
+
+
+def run_question_bank_worker():
+    logger.info("🏦 Question bank warm-up worker started...")
+    logger.info(f"Keeping {settings.QUESTION_BANK_TARGET_STOCK} questions per topic/difficulty/type in stock.")
+    asyncio.run(question_bank_loop())
+
+if __name__ == "__main__":
+    run_question_bank_worker()
@@ -1,78 +1,272 @@
+import heapq
 import logging
 from datetime import datetime, timedelta
 import time
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, update
 from app.db.session import SessionLocal
 from app.models.tasks import Task
-from app.services.email_service import send_email
+from app.models.user import UserTable
+from app.services.email_service import send_emails, close_email_pool
+from app.services.task_events import make_task_listener
 from app.core.config import settings
 
 # Configure logging to show time and message
 logging.basicConfig(
-    level=logging.INFO, 
+    level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-def run_reminders():
-    logger.info("🚀 Background reminder service started...")
-    logger.info(f"Checking for tasks within a {settings.REMINDER_WINDOW_MINUTES} minute window.")
-    
-    while True:
+
+# Failed sends on this worker: task_id -> (attempts, retry_at). Backed-off tasks are
+# left out of the claim so they cannot keep the head of the due_date order busy.
+_send_failures = {}
+
+
+def record_send_failure(task_id, now):
+    attempts = _send_failures.get(task_id, (0, now))[0] + 1
+    delay = settings.REMINDER_RETRY_SECONDS * 2 ** min(attempts - 1, 10)
+    _send_failures[task_id] = (attempts, now + timedelta(seconds=delay))
+
+
+def backed_off_ids(now):
+    """Ids still waiting out a retry delay; forgets entries long past theirs."""
+    for task_id, (_, retry_at) in list(_send_failures.items()):
+        if retry_at < now - timedelta(days=1):
+            del _send_failures[task_id]
+    return [task_id for task_id, (_, retry_at) in _send_failures.items() if retry_at > now]
+
+
+def claim_due_tasks(db, now, window, limit):
+    """
+    Locks up to `limit` tasks needing a reminder, skipping rows another worker
+    already holds, so several workers can run side by side without double-sending.
+    Users without an email and tasks backing off after a failed send are left
+    out. Locks are held until the caller commits (served by ix_tasks_reminder_due).
+    """
+    stmt = (
+        select(Task.id, Task.title, Task.due_date, UserTable.email)
+        .join(Task.user)
+        .where(
+            Task.due_date <= window,
+            Task.due_date >= now,  # Ensures we don't spam for expired tasks
+            Task.reminder_sent == False,
+            Task.status != 2,       # 2 = Completed
+            UserTable.email.isnot(None),
+            UserTable.email != ""
+        )
+    )
+    backed_off = backed_off_ids(now)
+    if backed_off:
+        stmt = stmt.where(Task.id.notin_(backed_off))
+    return db.execute(
+        stmt.order_by(Task.due_date)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=Task)
+    ).all()
+
+
+def send_reminder_batch(db, tasks):
+    """Sends one claimed batch and marks what went out in a single UPDATE. Returns the number sent."""
+    now = datetime.utcnow()
+    deliverable = []
+    for task in tasks:
+        if not task.email:
+            logger.warning(f"⚠️ Task {task.id} has no valid user email. Skipping.")
+            continue
+        deliverable.append(task)
+
+    # Send the whole batch concurrently over pooled SMTP connections
+    errors = send_emails([
+        (
+            task.email,
+            "⏰ Task Reminder",
+            f"Hi! Just a reminder that your task '{task.title}' is due at {task.due_date.strftime('%Y-%m-%d %H:%M')} (UTC)."
+        )
+        for task in deliverable
+    ])
+
+    sent_ids = []
+    for task, error in zip(deliverable, errors):
+        if error is None:
+            sent_ids.append(task.id)
+            _send_failures.pop(task.id, None)
+        else:
+            record_send_failure(task.id, now)
+            logger.error(f"❌ Failed to send email for Task ID {task.id}: {str(error)}")
+
+    # One UPDATE for everything that went out; failures are retried after their backoff
+    if sent_ids:
+        db.execute(
+            update(Task)
+            .where(Task.id.in_(sent_ids))
+            .values(reminder_sent=True)
+            .execution_options(synchronize_session=False)
+        )
+    # Committing also releases this batch's row locks
+    db.commit()
+    if deliverable:
+        logger.info(f"✅ Sent {len(sent_ids)}/{len(deliverable)} reminder(s) and updated 'reminder_sent'.")
+    return len(sent_ids)
+
+
+def deliver_due_reminders():
+    """Claims and sends batches until nothing due is left unclaimed. Returns the number sent."""
+    # 1. Get current time in UTC
+    now = datetime.utcnow()
+    # 2. Define the future boundary (e.g., now + 10 mins)
+    window = now + timedelta(minutes=settings.REMINDER_WINDOW_MINUTES)
+
+    sent = 0
+    db = SessionLocal()
+    try:
+        while True:
+            # 3. Claim a batch (rows locked by other workers are skipped, not waited on)
+            tasks = claim_due_tasks(db, now, window, settings.REMINDER_BATCH_SIZE)
+            if tasks:
+                logger.info(f"🎯 Claimed {len(tasks)} eligible task(s) for reminders.")
+            else:
+                db.rollback()
+                break
+            # 4. Send and mark them, releasing the claim
+            batch_sent = send_reminder_batch(db, tasks)
+            sent += batch_sent
+            # A short batch means we drained the window. An all-failed one suggests SMTP is down:
+            # stop for now; its tasks are backed off, so the next round claims past them
+            if len(tasks) < settings.REMINDER_BATCH_SIZE or batch_sent == 0:
+                break
+    except Exception as e:
+        logger.error(f"❌ Critical Database error in reminder loop: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+    return sent
+
+
+class ReminderScheduler:
+    """
+    Keeps a min-heap of upcoming reminder times and sleeps until the next one,
+    waking early when the API reports a task change. Fires at
+    due_date - REMINDER_WINDOW_MINUTES instead of on a fixed poll; a slow
+    reconciliation sweep every REMINDER_RECONCILE_SECONDS catches anything a
+    missed notification left out.
+    """
+
+    def __init__(self, listener):
+        self.listener = listener
+        self._heap = []       # (fire_at, task_id); may hold stale entries
+        self._fire_at = {}    # task_id -> its current fire_at
+        self._next_sweep = datetime.min
+
+    @staticmethod
+    def _window():
+        return timedelta(minutes=settings.REMINDER_WINDOW_MINUTES)
+
+    def _horizon(self, now):
+        # Anything due later is picked up by a later sweep, before its reminder time
+        return now + self._window() + timedelta(seconds=settings.REMINDER_RECONCILE_SECONDS)
+
+    def _schedule(self, task_id, due_date):
+        fire_at = due_date - self._window()
+        self._fire_at[task_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, task_id))
+
+    def load_upcoming(self, now):
+        """Rebuilds the heap from every pending task due before the next sweep."""
         db = SessionLocal()
         try:
-            # 1. Get current time in UTC
-            now = datetime.utcnow()
-            # 2. Define the future boundary (e.g., now + 10 mins)
-            window = now + timedelta(minutes=settings.REMINDER_WINDOW_MINUTES)
-
-            # Debug logs to help you see what the server is thinking
-            logger.info(f"Heartbeat: Checking DB at UTC {now.strftime('%H:%M:%S')}")
-
-            # 3. Query tasks
-            # .options(joinedload(Task.user)) ensures we get the email address efficiently
-            tasks = db.query(Task).options(joinedload(Task.user)).filter(
-                Task.due_date <= window,
-                Task.due_date >= now,  # Ensures we don't spam for expired tasks
-                Task.reminder_sent == False,
-                Task.status != 2        # 2 = Completed
+            rows = db.execute(
+                select(Task.id, Task.due_date).where(
+                    Task.due_date >= now,
+                    Task.due_date <= self._horizon(now),
+                    Task.reminder_sent == False,
+                    Task.status != 2
+                )
             ).all()
+        finally:
+            db.close()
 
-            if tasks:
-                logger.info(f"🎯 Found {len(tasks)} eligible task(s) for reminders.")
-
-            for task in tasks:
-                try:
-                    if not task.user or not task.user.email:
-                        logger.warning(f"⚠️ Task {task.id} has no valid user email. Skipping.")
-                        continue
-
-                    logger.info(f"📧 Sending email for '{task.title}' to {task.user.email}")
-                    
-                    send_email(
-                        to=task.user.email,
-                        subject="⏰ Task Reminder",
-                        body=f"Hi! Just a reminder that your task '{task.title}' is due at {task.due_date.strftime('%Y-%m-%d %H:%M')} (UTC)."
-                    )
-                    
-                    # 4. Mark as sent and commit immediately for this task
-                    task.reminder_sent = True
-                    db.add(task)
-                    db.commit()
-                    logger.info(f"✅ Successfully updated 'reminder_sent' for Task ID: {task.id}")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Failed to send email for Task ID {task.id}: {str(e)}")
-                    db.rollback() # Rollback only this task's status change if email failed
-
-        except Exception as e:
-            logger.error(f"❌ Critical Database error in reminder loop: {str(e)}")
-            db.rollback()
+        self._heap = []
+        self._fire_at = {}
+        for row in rows:
+            self._schedule(row.id, row.due_date)
+        logger.info(f"🗓️ Scheduled {len(rows)} upcoming reminder(s).")
+
+    def refresh(self, task_ids, now):
+        """Re-reads changed tasks and (re)schedules the ones that still need a reminder."""
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(Task.id, Task.due_date, Task.reminder_sent, Task.status)
+                .where(Task.id.in_(task_ids))
+            ).all()
         finally:
             db.close()
-            
-        # 5. Wait for 60 seconds before checking again
-        time.sleep(60)
+
+        for task_id in task_ids:
+            self._fire_at.pop(task_id, None)  # turns any old heap entry stale
+        for row in rows:
+            if (
+                row.due_date is not None
+                and now <= row.due_date <= self._horizon(now)
+                and not row.reminder_sent
+                and row.status != 2
+            ):
+                self._schedule(row.id, row.due_date)
+
+    def fire_due(self, now):
+        """Pops every reminder whose time has come and sends them in one claim-and-send pass."""
+        due = False
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, task_id = heapq.heappop(self._heap)
+            if self._fire_at.get(task_id) == fire_at:
+                del self._fire_at[task_id]
+                due = True
+        if due:
+            deliver_due_reminders()
+
+    def seconds_until_next(self, now):
+        wake_at = self._next_sweep
+        if self._heap:
+            wake_at = min(wake_at, self._heap[0][0])
+        return max((wake_at - now).total_seconds(), 0)
+
+    def run_once(self):
+        now = datetime.utcnow()
+        if now >= self._next_sweep:
+            # Reconciliation sweep
+            logger.info(f"Heartbeat: reconciling reminders at UTC {now.strftime('%H:%M:%S')}")
+            deliver_due_reminders()
+            self.load_upcoming(now)
+            self._next_sweep = now + timedelta(seconds=settings.REMINDER_RECONCILE_SECONDS)
+
+        self.fire_due(now)
+
+        task_ids = self.listener.poll(self.seconds_until_next(now))
+        if task_ids:
+            self.refresh(task_ids, datetime.utcnow())
+
+    def run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Critical error in reminder scheduler: {str(e)}")
+                time.sleep(5)
+
+
+def run_reminders():
+    logger.info("🚀 Background reminder service started...")
+    logger.info(f"Reminding {settings.REMINDER_WINDOW_MINUTES} minute(s) before tasks are due.")
+
+    listener = make_task_listener()
+    try:
+        ReminderScheduler(listener).run()
+    finally:
+        listener.close()
 
 if __name__ == "__main__":
-    run_reminders()
\ No newline at end of file
+    try:
+        run_reminders()
+    finally:
+        close_email_pool()
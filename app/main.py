@@ -1,7 +1,9 @@
 from fastapi import FastAPI
-from app.db.session import engine
+from app.db.session import async_engine
 from app.db.db import Base
+from app.db.indexes import ensure_indexes
 from app.models.user import UserTable
+from app.models.question_bank import BankQuestion
 from app.api import auth
 from app.api import users
 from app.api import tasks
@@ -9,10 +11,39 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api import exam
 from app.api import stat
 from fastapi.staticfiles import StaticFiles
+from app.core.config import settings
+from app.core.static_files import ImmutableStaticFiles
 import os
 import uvicorn
 from contextlib import asynccontextmanager
-app = FastAPI()
+from app.services.pdf_service import shutdown_pdf_executor
+from app.services.password_service import shutdown_password_executor
+from app.services.gemini_service import close_gemini_client
+from app.services.web_service import close_web_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # This runs when the app starts
+    try:
+        print("Connecting to database...")
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            # create_all never alters existing tables, so newer indexes are added here
+            await conn.run_sync(ensure_indexes)
+        print("✅ Database tables synced.")
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+    yield
+    # This runs when the app shuts down
+    shutdown_pdf_executor()
+    shutdown_password_executor()
+    await close_gemini_client()
+    await close_web_client()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # In main.py
 origins = [
@@ -26,6 +57,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"], # Explicitly include OPTIONS
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"], # Lets the frontend read pagination cursors
 )
 current_file_path = os.path.abspath(__file__) 
 
@@ -43,22 +75,13 @@ if not os.path.exists(static_path):
     os.makedirs(os.path.join(static_path, "exam_images"), exist_ok=True)
     print(f"📁 Created missing directory: {static_path}")
 
-# 5. Mount the directory
+# 5. Mount the directories. Hash-named exam diagrams get immutable caching;
+# this mount must come before "/static" so it takes precedence.
+os.makedirs(settings.DIAGRAM_DIR, exist_ok=True)
+app.mount("/static/exam_images", ImmutableStaticFiles(directory=settings.DIAGRAM_DIR), name="exam_images")
 app.mount("/static", StaticFiles(directory=static_path), name="static")
 
 print(f"🚀 Server starting. Static files served from: {static_path}")
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # This runs when the app starts
-    try:
-        print("Connecting to database...")
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables synced.")
-    except Exception as e:
-        print(f"❌ Database connection failed: {e}")
-    yield
-    # This runs when the app shuts down
-    pass
 print(f"✅ Static files mounted at: {static_path}")
 app.include_router(users.router)
 app.include_router(auth.router)
@@ -1 +1,2 @@
-from .result import ExamResult
\ No newline at end of file
+from .result import ExamResult
+from .user_stats import UserStats
\ No newline at end of file
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, UniqueConstraint
+from datetime import datetime
+from app.db.db import Base
+
+class BankQuestion(Base):
+    """A pre-generated, validated question waiting to be served by /exam/generate."""
+    __tablename__ = "question_bank"
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)           # normalized (lowercase, single spaces)
+    difficulty = Column(String(20), nullable=False)
+    q_type = Column(String(20), nullable=False)
+    fingerprint = Column(String(64), nullable=False) # sha256 of the normalized question text
+    payload = Column(JSON, nullable=False)           # the question object exactly as served
+    served_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_question_bank_lookup", "topic", "difficulty", "q_type", "served_count"),
+        UniqueConstraint("topic", "difficulty", "q_type", "fingerprint", name="uq_question_bank_fingerprint"),
+    )
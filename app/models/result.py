@@ -1,8 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index
 from datetime import datetime
-
-Base = declarative_base()
+from app.db.db import Base
 
 class ExamResult(Base):
     __tablename__ = "exam_results"
@@ -18,4 +16,9 @@ class ExamResult(Base):
     accuracy = Column(Float)
     time_spent = Column(Integer) 
     sectional_breakdown = Column(JSON) 
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Serves "WHERE user_id = ? ORDER BY created_at DESC LIMIT n" without a sort
+        Index("ix_exam_results_user_created", "user_id", "created_at"),
+    )
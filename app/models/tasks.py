@@ -1,10 +1,22 @@
-from sqlalchemy import Column, Integer, String, SmallInteger, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, SmallInteger, DateTime, Boolean, ForeignKey, Index, text
 from datetime import datetime
 from app.db.db import Base
 from sqlalchemy.orm import relationship
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination for /get-task, with and without ?status=
+        Index("ix_tasks_user_due_id", "user_id", "due_date", "id"),
+        Index("ix_tasks_user_status_due_id", "user_id", "status", "due_date", "id"),
+        # Reminder workers only ever scan tasks still waiting for a reminder
+        Index(
+            "ix_tasks_reminder_due",
+            "due_date",
+            postgresql_where=text("reminder_sent = false AND status <> 2"),
+            sqlite_where=text("reminder_sent = 0 AND status <> 2")
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String(120), nullable=False)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from datetime import datetime
+from app.db.db import Base
+
+class UserStats(Base):
+    """
+    Running per-user aggregate of exam_results, maintained by save_result
+    so the stats endpoints never have to scan a user's history.
+    """
+    __tablename__ = "user_stats"
+
+    user_id = Column(String, primary_key=True)
+    total_mocks = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Float, default=0.0, nullable=False)
+    accuracy_sum = Column(Float, default=0.0, nullable=False)
+    latest_sectional = Column(JSON)
+    # Ring buffer of the last STATS_TREND_SIZE results, oldest first: [{"date": iso, "score": x}, ...]
+    recent = Column(JSON, default=list, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,19 @@
+def pdf_exam_prompt(context_text, difficulty, total_questions, q_types):
+    # MASTER PDF PROMPT: Forces JSON and kills conversational noise
+    return f"""
+    [SYSTEM INSTRUCTION]: You are a JSON-only generator. No preamble. No conversational text.
+    
+    [CONTEXT]: 
+    {context_text}
+    
+    [TASK]: 
+    Generate exactly {total_questions} questions based ONLY on the context above.
+    Difficulty: {difficulty}
+    Allowed Types: {q_types}
+
+    [OUTPUT RULES]:
+    1. Start your response immediately with '[' and end with ']'.
+    2. Do NOT use markdown code blocks (No ```json).
+    3. Ensure every object has: "type", "question", "options", "answer", "explanation".
+    4. For Figure Logic, use the "matrix" field with Unicode symbols ONLY.
+    """
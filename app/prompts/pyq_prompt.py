@@ -0,0 +1,53 @@
+def pyq_extraction_prompt(qidxs, document_text):
+    qidx_list = ", ".join(str(qidx) for qidx in qidxs)
+    return f"""
+[SYSTEM ROLE]
+You are a deterministic competitive-exam question extractor.
+You NEVER explain.
+You NEVER guess.
+You NEVER hallucinate.
+You ONLY extract what explicitly exists.
+
+[TASK]
+The document below holds {len(qidxs)} question block(s).
+Extract exactly one multiple-choice question from each block whose
+@@QIDX is one of: {qidx_list}.
+
+[QUESTION BOUNDARY — GUARANTEED]
+Every question start is explicitly marked by:
+@@QUESTION_START@@ @@QIDX:<n>@@
+
+You MUST treat this marker as the ONLY valid question boundary.
+Numbered statements inside a block belong to that block's question.
+
+[QIDX RULE]
+Every output object MUST carry "qidx": the integer <n> from the
+@@QIDX:<n>@@ marker of the block it was extracted from.
+If a block holds no real question, output nothing for it.
+NEVER output a qidx that is not in the list above.
+
+[OPTIONS]
+- Exactly 4 options per question
+- Remove option labels (A/B/1/2)
+- Preserve wording exactly
+
+[ANSWER RULE]
+- Use answer ONLY if explicitly present
+- Otherwise:
+  "answer": ""
+  "explanation": ""
+
+[OUTPUT — JSON ONLY]
+[
+  {{
+    "qidx": 0,
+    "question": "Exact question text",
+    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+    "answer": "",
+    "explanation": ""
+  }}
+]
+
+[DOCUMENT TEXT]
+{document_text}
+"""
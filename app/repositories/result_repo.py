@@ -0,0 +1,48 @@
+from sqlalchemy import func, insert, select
+from app.models.result import ExamResult
+
+class ResultRepository:
+
+        @staticmethod
+        async def summary(db, user_id):
+            """(count, avg_score, avg_accuracy) computed in SQL."""
+            result = await db.execute(
+                select(
+                    func.count(ExamResult.id),
+                    func.avg(ExamResult.score),
+                    func.avg(ExamResult.accuracy)
+                ).where(ExamResult.user_id == user_id)
+            )
+            return result.one()
+
+        @staticmethod
+        async def totals(db, user_id):
+            """(count, score_sum, accuracy_sum) computed in SQL."""
+            result = await db.execute(
+                select(
+                    func.count(ExamResult.id),
+                    func.coalesce(func.sum(ExamResult.score), 0.0),
+                    func.coalesce(func.sum(ExamResult.accuracy), 0.0)
+                ).where(ExamResult.user_id == user_id)
+            )
+            return result.one()
+
+        @staticmethod
+        async def latest(db, user_id, limit):
+            """Newest `limit` results, newest first (served by ix_exam_results_user_created)."""
+            result = await db.execute(
+                select(ExamResult)
+                .where(ExamResult.user_id == user_id)
+                .order_by(ExamResult.created_at.desc(), ExamResult.id.desc())
+                .limit(limit)
+            )
+            return result.scalars().all()
+
+        @staticmethod
+        async def bulk_insert(db, rows):
+            """
+            Inserts a list of column dicts as one multi-row INSERT ... RETURNING.
+            Returns the new ids in the same order as `rows`. Caller commits.
+            """
+            stmt = insert(ExamResult).returning(ExamResult.id, sort_by_parameter_order=True)
+            return list(await db.scalars(stmt, rows))
@@ -0,0 +1,82 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.models.user_stats import UserStats
+from app.repositories.result_repo import ResultRepository
+
+class StatsRepository:
+
+        @staticmethod
+        async def get(db, user_id):
+            return await db.get(UserStats, user_id)
+
+        @staticmethod
+        async def _fill_from_results(db, stats):
+            """Sets the aggregate to exactly what exam_results holds for the user."""
+            total, score_sum, accuracy_sum = await ResultRepository.totals(db, stats.user_id)
+            latest = await ResultRepository.latest(db, stats.user_id, settings.STATS_TREND_SIZE)
+
+            stats.total_mocks = total
+            stats.score_sum = score_sum
+            stats.accuracy_sum = accuracy_sum
+            stats.latest_sectional = latest[0].sectional_breakdown if latest else None
+            stats.recent = [
+                {"date": r.created_at.isoformat(), "score": r.score}
+                for r in reversed(latest)
+            ]
+            return stats
+
+        @staticmethod
+        async def _get_for_update(db, user_id):
+            """
+            Locks the user's aggregate row, creating it on first use.
+            A new row is seeded from the user's existing exam_results, so a user
+            with history from before user_stats existed keeps their totals.
+            Returns (stats, seeded).
+            """
+            stmt = select(UserStats).where(UserStats.user_id == user_id).with_for_update()
+            stats = (await db.execute(stmt)).scalars().first()
+            if stats:
+                return stats, False
+            try:
+                async with db.begin_nested():
+                    stats = await StatsRepository._fill_from_results(db, UserStats(user_id=user_id))
+                    db.add(stats)
+                return stats, True
+            except IntegrityError:
+                # Another request created it first
+                return (await db.execute(stmt)).scalars().first(), False
+
+        @staticmethod
+        async def apply_result(db, result):
+            """Folds one new ExamResult into the aggregate. Caller commits (same transaction as the insert)."""
+            return await StatsRepository.apply_results(db, result.user_id, [result])
+
+        @staticmethod
+        async def apply_results(db, user_id, results):
+            """
+            Folds several new results (oldest first) for one user into the
+            aggregate in one update. The results must already be flushed.
+            """
+            stats, seeded = await StatsRepository._get_for_update(db, user_id)
+            if seeded:
+                # The seed was read from exam_results and already includes `results`
+                return stats
+            stats.total_mocks += len(results)
+            stats.score_sum += sum(r.score for r in results)
+            stats.accuracy_sum += sum(r.accuracy for r in results)
+            stats.latest_sectional = results[-1].sectional_breakdown
+            # Reassign (not append) so SQLAlchemy sees the JSON change
+            stats.recent = (stats.recent + [
+                {"date": r.created_at.isoformat(), "score": r.score}
+                for r in results
+            ])[-settings.STATS_TREND_SIZE:]
+            return stats
+
+        @staticmethod
+        async def rebuild(db, user_id):
+            """Recomputes a user's aggregate from exam_results (used by the backfill job)."""
+            stats, seeded = await StatsRepository._get_for_update(db, user_id)
+            if seeded:
+                return stats
+            return await StatsRepository._fill_from_results(db, stats)
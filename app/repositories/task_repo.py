@@ -0,0 +1,64 @@
+from datetime import datetime
+from sqlalchemy import and_, or_, select
+from app.models.tasks import Task
+
+# Only what TaskResponse serializes; skips user_id and never touches the user relationship
+TASK_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.status,
+    Task.due_date,
+    Task.reminder_sent,
+    Task.created_at,
+    Task.updated_at,
+)
+
+class TaskRepository:
+
+        @staticmethod
+        async def page(db, user_id, limit, after=None, status=None, due_from=None, due_to=None):
+            """
+            One page of a user's tasks ordered by (due_date, id), undated tasks last.
+            `after` is the (due_date, id) of the previous page's last row. Fetches one
+            extra row so the caller knows whether there is a next page.
+            Served by ix_tasks_user_due_id / ix_tasks_user_status_due_id.
+            """
+            query = select(*TASK_COLUMNS).where(Task.user_id == user_id)
+
+            if status is not None:
+                query = query.where(Task.status == status)
+            if due_from is not None:
+                query = query.where(Task.due_date >= due_from)
+            if due_to is not None:
+                query = query.where(Task.due_date < due_to)
+
+            if after is not None:
+                after_due, after_id = after
+                if after_due is None:
+                    # Already into the undated tail
+                    query = query.where(Task.due_date.is_(None), Task.id > after_id)
+                else:
+                    query = query.where(or_(
+                        Task.due_date > after_due,
+                        and_(Task.due_date == after_due, Task.id > after_id),
+                        Task.due_date.is_(None)
+                    ))
+
+            result = await db.execute(
+                query.order_by(Task.due_date.asc().nulls_last(), Task.id.asc()).limit(limit + 1)
+            )
+            return result.mappings().all()
+
+        @staticmethod
+        def cursor_values(row):
+            return row["due_date"], row["id"]
+
+        @staticmethod
+        def parse_cursor_values(values):
+            due_date, task_id = values
+            try:
+                if not isinstance(task_id, int):
+                    raise ValueError("Invalid cursor")
+                return (datetime.fromisoformat(due_date) if due_date is not None else None), task_id
+            except (TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
@@ -1,10 +1,44 @@
+from sqlalchemy import select
 from app.models.user import UserTable
 
+# Public profile columns (what UserOut serializes) — never the password hash
+USER_COLUMNS = (
+    UserTable.id,
+    UserTable.email,
+    UserTable.full_name,
+    UserTable.created_at,
+    UserTable.updated_at,
+)
+
 class UserRepository:
 
         @staticmethod
-        def get_user_by_email(db,email):
-            return db.query(UserTable).filter(UserTable.email == email).first()
+        async def get_user_by_email(db,email):
+            result = await db.execute(select(UserTable).where(UserTable.email == email))
+            return result.scalars().first()
+
+        @staticmethod
+        async def page(db, limit, after_id=None):
+            """Users ordered by id after `after_id`; fetches one extra row to detect a next page."""
+            query = select(*USER_COLUMNS)
+            if after_id is not None:
+                query = query.where(UserTable.id > after_id)
+            result = await db.execute(query.order_by(UserTable.id).limit(limit + 1))
+            return result.mappings().all()
+
+        @staticmethod
+        async def stream_all(db, chunk_size):
+            """
+            Yields every user in id order, `chunk_size` rows per batch, over a
+            server-side cursor so memory stays flat however big the table is.
+            """
+            result = await db.stream(
+                select(*USER_COLUMNS)
+                .order_by(UserTable.id)
+                .execution_options(yield_per=chunk_size)
+            )
+            async for partition in result.mappings().partitions():
+                yield partition
         
 
 # Why:
@@ -13,4 +47,4 @@ class UserRepository:
 
 # No business rules
 
-# Makes code testable
\ No newline at end of file
+# Makes code testable
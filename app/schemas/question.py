@@ -0,0 +1,38 @@
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
+
+QUESTION_TYPES = ["MCQ", "Passage", "Figure Logic", "Short Answer"]
+
+
+class Question(BaseModel):
+    """One generated question, as described by the JSON schema in exam_prompt."""
+    type: str
+    question: str
+    options: Optional[List[str]] = None
+    answer: Optional[str] = None
+    explanation: str
+    passage_text: Optional[str] = None
+    matrix: Optional[List[str]] = None
+    model_answer: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_type_rules(self):
+        if self.type not in QUESTION_TYPES:
+            raise ValueError(f"Unknown question type '{self.type}'")
+        if not self.question.strip():
+            raise ValueError("Empty question text")
+
+        if self.type == "Short Answer":
+            if not self.model_answer:
+                raise ValueError("Short Answer requires 'model_answer'")
+            return self
+
+        if not self.options or len(self.options) != 4:
+            raise ValueError("Exactly 4 options required")
+        if self.answer is None or self.answer.strip() not in [o.strip() for o in self.options]:
+            raise ValueError("'answer' must match one of the options")
+        if self.type == "Passage" and not self.passage_text:
+            raise ValueError("Passage requires 'passage_text'")
+        if self.type == "Figure Logic" and (not self.matrix or len(self.matrix) != 9):
+            raise ValueError("Figure Logic requires a 9-symbol 'matrix'")
+        return self
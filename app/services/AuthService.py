@@ -1,15 +1,25 @@
 from app.repositories.user_repo import UserRepository
 from app.schemas.auth import UserOut, LoginResponse
-from app.core.security import verify_password, create_token
+from app.core.security import create_token
+from app.services.password_service import verify_password_async
 
 class AuthService:
 
     @staticmethod
-    def login(data, db):
-        user_instance = UserRepository.get_user_by_email(db, data.email)
+    async def login(data, db):
+        user_instance = await UserRepository.get_user_by_email(db, data.email)
+        if not user_instance:
+            raise Exception(401, "Invalid Credentials")
 
-        if not user_instance or not verify_password(data.password, user_instance.password):
+        # Argon2 runs on its own bounded pool; raises 429 when it is saturated
+        valid, new_hash = await verify_password_async(data.password, user_instance.password)
+        if not valid:
             raise Exception(401, "Invalid Credentials")
+
+        # Argon2 parameters changed since this hash was made: upgrade it now we know the password
+        if new_hash:
+            user_instance.password = new_hash
+            await db.commit()
          
         token = create_token(user_instance.id)
         user_data = UserOut.from_orm(user_instance)  # must be instance
@@ -0,0 +1,210 @@
+# app/services/diagram_service.py
+import hashlib
+import io
+import logging
+import os
+import time
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+from app.services.pdf_cache import pdf_cache
+from app.services.pdf_service import _parse_in_pool
+
+logger = logging.getLogger(__name__)
+
+# Public URL prefix for DIAGRAM_DIR (the ImmutableStaticFiles mount in main.py)
+DIAGRAM_URL_PREFIX = "/static/exam_images"
+
+
+# -------------------------------
+# Region detection (vectorized bbox math)
+# -------------------------------
+
+def _visual_boxes(page) -> np.ndarray:
+    """(N, 4) x0, y0, x1, y1 of every raster image and vector drawing on the page."""
+    boxes = [info["bbox"] for info in page.get_image_info()]
+    boxes += [tuple(drawing["rect"]) for drawing in page.get_drawings()]
+    if not boxes:
+        return np.empty((0, 4))
+    return np.asarray(boxes, dtype=float)
+
+
+def cluster_boxes(boxes: np.ndarray, gap: float) -> np.ndarray:
+    """
+    Merges boxes that overlap or sit within `gap` points of each other into one
+    box per connected group, so a diagram's strokes, labels and images become a
+    single region. Repeats until merged regions no longer touch.
+    """
+    while len(boxes) > 1:
+        grown = boxes + np.array([-gap, -gap, gap, gap])
+        # Pairwise "touches" matrix via broadcasting
+        touches = (
+            (grown[:, None, 0] <= grown[None, :, 2]) & (grown[None, :, 0] <= grown[:, None, 2]) &
+            (grown[:, None, 1] <= grown[None, :, 3]) & (grown[None, :, 1] <= grown[:, None, 3])
+        )
+
+        # Connected components: propagate the smallest index through the graph
+        labels = np.arange(len(boxes))
+        while True:
+            spread = np.where(touches, labels[None, :], len(boxes)).min(axis=1)
+            if np.array_equal(spread, labels):
+                break
+            labels = spread
+
+        groups, labels = np.unique(labels, return_inverse=True)
+        if len(groups) == len(boxes):
+            break
+        merged = np.empty((len(groups), 4))
+        merged[:, :2] = np.inf
+        merged[:, 2:] = -np.inf
+        np.minimum.at(merged[:, 0], labels, boxes[:, 0])
+        np.minimum.at(merged[:, 1], labels, boxes[:, 1])
+        np.maximum.at(merged[:, 2], labels, boxes[:, 2])
+        np.maximum.at(merged[:, 3], labels, boxes[:, 3])
+        boxes = merged
+    return boxes
+
+
+def find_diagram_regions(page, gap: float, min_size: float) -> np.ndarray:
+    """Diagram regions on a page, top to bottom, with watermarks/borders and specks dropped."""
+    width, height = page.rect.width, page.rect.height
+    boxes = _visual_boxes(page)
+    if len(boxes) == 0:
+        return boxes
+
+    # Items spanning most of the page are watermarks, frames or header rules
+    sizes = boxes[:, 2:] - boxes[:, :2]
+    boxes = boxes[(sizes[:, 0] < width * 0.8) & (sizes[:, 1] < height * 0.8)]
+    if len(boxes) > settings.DIAGRAM_MAX_ITEMS:
+        logger.warning(f"⚠️ Page {page.number + 1} has {len(boxes)} drawing items, skipping diagram detection")
+        return np.empty((0, 4))
+
+    regions = cluster_boxes(boxes, gap)
+    sizes = regions[:, 2:] - regions[:, :2]
+    keep = (
+        (sizes[:, 0] >= min_size) & (sizes[:, 1] >= min_size) &
+        # More than half the page tall is probably not a single diagram
+        (sizes[:, 1] <= height * 0.5)
+    )
+    regions = regions[keep]
+    return regions[np.lexsort((regions[:, 0], regions[:, 1]))]
+
+
+# -------------------------------
+# Content-addressed output
+# -------------------------------
+
+def store_image(data: bytes, out_dir: str, ext: str = "png") -> str:
+    """Writes `data` under its SHA-256 name unless an identical image is already stored."""
+    name = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return name
+
+
+def _webp_bytes(image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def store_variants(png_bytes: bytes, out_dir: str, webp_quality: int, thumb_size: int) -> dict:
+    """Stores the PNG plus a WebP copy and a WebP thumbnail, each under its own content hash."""
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        image = image.convert("RGBA") if image.mode in ("P", "LA") else image
+        webp = _webp_bytes(image, webp_quality)
+        thumb = image.copy()
+        thumb.thumbnail((thumb_size, thumb_size))
+        thumb_webp = _webp_bytes(thumb, webp_quality)
+    return {
+        "file": store_image(png_bytes, out_dir, "png"),
+        "webp": store_image(webp, out_dir, "webp"),
+        "thumb": store_image(thumb_webp, out_dir, "webp"),
+    }
+
+
+# -------------------------------
+# Page worker (runs inside the PDF process pool)
+# -------------------------------
+
+def _extract_page_diagrams(file_bytes, start=0, stop=None, dpi=200, out_dir=None, gap=12.0, min_size=20.0,
+                           webp_quality=80, thumb_size=320):
+    """Detects, renders and stores the diagrams on pages [start, stop)."""
+    results = []
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        stop = doc.page_count if stop is None else stop
+        for i in range(start, stop):
+            t0 = time.perf_counter()
+            page = doc[i]
+            diagrams = []
+            for x0, y0, x1, y1 in find_diagram_regions(page, gap, min_size):
+                clip = fitz.Rect(x0 - 5, y0 - 5, x1 + 5, y1 + 5) & page.rect
+                # Only the clip is rasterized, not the whole page
+                pix = page.get_pixmap(clip=clip, dpi=dpi)
+                diagrams.append({
+                    "page": i + 1,
+                    "bbox": [round(v, 2) for v in (clip.x0, clip.y0, clip.x1, clip.y1)],
+                    **store_variants(pix.tobytes("png"), out_dir, webp_quality, thumb_size),
+                    "width": pix.width,
+                    "height": pix.height,
+                })
+            results.append({
+                "page": i + 1,
+                "diagrams": diagrams,
+                "ms": round((time.perf_counter() - t0) * 1000, 2),
+            })
+    return results
+
+
+# -------------------------------
+# Public API
+# -------------------------------
+
+def _with_urls(diagrams):
+    return [
+        {
+            **d,
+            "url": f"{DIAGRAM_URL_PREFIX}/{d['file']}",
+            "webp_url": f"{DIAGRAM_URL_PREFIX}/{d['webp']}",
+            "thumb_url": f"{DIAGRAM_URL_PREFIX}/{d['thumb']}",
+        }
+        for d in diagrams
+    ]
+
+
+async def extract_diagrams_async(file_bytes):
+    """
+    Every diagram in the PDF, in page order, rendered at DIAGRAM_DPI into
+    DIAGRAM_DIR. Returns (diagrams, timings). Repeat uploads of the same file
+    reuse the stored images without re-rendering.
+    """
+    kind = f"diagrams_{settings.DIAGRAM_DPI}dpi"
+    key = pdf_cache.key(file_bytes)
+    cached = pdf_cache.get(key, kind)
+    if cached is not None and all(
+        os.path.exists(os.path.join(settings.DIAGRAM_DIR, d[variant]))
+        for d in cached for variant in ("file", "webp", "thumb")
+    ):
+        return _with_urls(cached), []
+
+    os.makedirs(settings.DIAGRAM_DIR, exist_ok=True)
+    pages, timings = await _parse_in_pool(
+        _extract_page_diagrams,
+        file_bytes,
+        settings.DIAGRAM_DPI,
+        settings.DIAGRAM_DIR,
+        settings.DIAGRAM_MERGE_GAP,
+        settings.DIAGRAM_MIN_SIZE,
+        settings.DIAGRAM_WEBP_QUALITY,
+        settings.DIAGRAM_THUMB_SIZE
+    )
+    diagrams = [d for page in pages for d in page["diagrams"]]
+    logger.info(f"🖼️ Extracted {len(diagrams)} diagram(s) from {len(pages)} page(s)")
+
+    pdf_cache.set(key, kind, diagrams)
+    return _with_urls(diagrams), timings
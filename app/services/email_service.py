@@ -1,15 +1,135 @@
+import logging
+import queue
 import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from app.core.config import settings
 
-def send_email(to: str, subject: str, body: str):
+logger = logging.getLogger(__name__)
+
+
+def build_message(to: str, subject: str, body: str):
     msg = MIMEText(body)
     msg["Subject"] = subject
     msg["From"] = settings.EMAIL_FROM
     msg["To"] = to
+    return msg
+
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `size` authenticated SMTP connections open between sends, so a
+    burst of reminders pays for connect + STARTTLS + login once per connection
+    instead of once per message.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True, size=4, timeout=30):
+        self.host = host
+        self.port = int(port) if port else 0
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _discard(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrows a live connection (blocking while all `size` are in use)."""
+        with self._slots:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._connect()
+            try:
+                yield server
+            except Exception as e:
+                if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException):
+                    # Socket-level failure: the connection is in an unknown state
+                    self._discard(server)
+                else:
+                    # Server refused this message; the session itself is still usable
+                    self._idle.put_nowait(server)
+                raise
+            else:
+                self._idle.put_nowait(server)
+
+    def send(self, msg):
+        try:
+            with self.connection() as server:
+                server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Server dropped an idle connection; retry once on a fresh one
+            with self.connection() as server:
+                server.send_message(msg)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+smtp_pool = SMTPConnectionPool(
+    settings.EMAIL_HOST,
+    settings.EMAIL_PORT,
+    settings.EMAIL_USERNAME,
+    settings.EMAIL_PASSWORD,
+    use_tls=settings.EMAIL_USE_TLS,
+    size=settings.EMAIL_POOL_SIZE,
+    timeout=settings.EMAIL_TIMEOUT_SECONDS
+)
+
+# Bounded: at most EMAIL_POOL_SIZE messages in flight, one per pooled connection
+_send_executor = None
+
+
+def _get_send_executor():
+    global _send_executor
+    if _send_executor is None:
+        _send_executor = ThreadPoolExecutor(
+            max_workers=settings.EMAIL_POOL_SIZE, thread_name_prefix="smtp"
+        )
+    return _send_executor
+
+
+def send_email(to: str, subject: str, body: str):
+    smtp_pool.send(build_message(to, subject, body))
+
+
+def send_emails(messages):
+    """
+    Sends (to, subject, body) tuples concurrently over the pooled connections.
+    Returns one entry per message, in order: None on success, the exception otherwise.
+    """
+    futures = [
+        _get_send_executor().submit(send_email, to, subject, body)
+        for to, subject, body in messages
+    ]
+    return [future.exception() for future in futures]
+
 
-    server = smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT)
-    server.starttls()
-    server.login(settings.EMAIL_USERNAME, settings.EMAIL_PASSWORD)
-    server.send_message(msg)
-    server.quit()
+def close_email_pool():
+    global _send_executor
+    if _send_executor is not None:
+        _send_executor.shutdown(wait=True)
+        _send_executor = None
+    smtp_pool.close()
@@ -0,0 +1,167 @@
+# app/services/fanout_service.py
+import asyncio
+import json
+import logging
+import re
+from app.core.config import settings
+from app.services.gemini_service import generate_questions_stream_async
+from app.services.json_stream import iter_json_objects, validate_question
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def use_fan_out(requested, total_questions: int) -> bool:
+    """Explicit flag wins; otherwise fan out only for large exams."""
+    if requested is not None:
+        return requested
+    return total_questions >= settings.EXAM_FANOUT_MIN_QUESTIONS
+
+
+def _split(total: int, parts: int):
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def plan_type_batches(total_questions: int, q_types, batch_size: int = None):
+    """
+    Partitions an exam by q_type, then into batches of at most `batch_size`.
+    Returns [(count, [q_type]), ...].
+    """
+    batch_size = batch_size or settings.EXAM_FANOUT_BATCH_SIZE
+    q_types = list(dict.fromkeys(q_types)) or ["MCQ"]
+    batches = []
+    for q_type, quota in zip(q_types, _split(total_questions, len(q_types))):
+        if quota == 0:
+            continue
+        parts = -(-quota // batch_size)
+        batches.extend((count, [q_type]) for count in _split(quota, parts))
+    return batches
+
+
+def plan_context_batches(total_questions: int, context_text: str, batch_size: int = None):
+    """
+    Partitions a document into consecutive chunks, one per batch, so each
+    batch asks about a different part of the source.
+    Returns [(count, context_chunk), ...].
+    """
+    batch_size = batch_size or settings.EXAM_FANOUT_BATCH_SIZE
+    parts = max(1, -(-total_questions // batch_size))
+    paragraphs = [p for p in context_text.split("\n") if p.strip()]
+    target = max(1, sum(len(p) for p in paragraphs) // parts)
+
+    chunks, current, size = [], [], 0
+    for paragraph in paragraphs:
+        current.append(paragraph)
+        size += len(paragraph)
+        if size >= target and len(chunks) < parts - 1:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+    if current or not chunks:
+        chunks.append("\n".join(current))
+
+    return list(zip(_split(total_questions, len(chunks)), chunks))
+
+
+def batch_note(index: int, total_batches: int) -> str:
+    """Appended to each sub-prompt so parallel batches do not all ask the same questions."""
+    if total_batches == 1:
+        return ""
+    return (
+        f"\n    [BATCH {index + 1} OF {total_batches}]: Other batches are generated in parallel. "
+        f"Cover different sub-topics and facts from the other batches; avoid the most obvious questions.\n"
+    )
+
+
+class NearDuplicateFilter:
+    """Drops questions whose word set overlaps an earlier one by more than `threshold` (Jaccard)."""
+
+    def __init__(self, threshold: float = None):
+        self.threshold = threshold if threshold is not None else settings.EXAM_DEDUP_THRESHOLD
+        self._seen = []
+
+    @staticmethod
+    def _words(question: dict):
+        return frozenset(_WORD.findall(str(question.get("question", "")).lower()))
+
+    def is_new(self, question: dict) -> bool:
+        words = self._words(question)
+        if not words:
+            return False
+        for seen in self._seen:
+            if len(words & seen) / len(words | seen) >= self.threshold:
+                return False
+        self._seen.append(words)
+        return True
+
+
+async def _raise_on_error(stream):
+    """generate_questions_stream_async reports failures as an "Error:" chunk; turn that into an exception."""
+    first = True
+    async for chunk in stream:
+        if first and chunk.startswith("Error:"):
+            raise RuntimeError(chunk[len("Error:"):].strip())
+        first = False
+        yield chunk
+
+
+async def fan_out_stream(prompts, request=None, concurrency: int = None):
+    """
+    Runs the sub-prompts concurrently (at most `concurrency` at a time) and
+    streams one JSON array back, adding each validated, de-duplicated
+    question as soon as any batch produces it. The output has the same
+    shape as a single generation, so caching and ?format= framing work unchanged.
+
+    Failed batches are not hidden: if every batch fails the stream is a
+    single "Error: ..." chunk, like a failed single generation; if only some
+    fail, the array simply comes up short of the requested count.
+    """
+    concurrency = concurrency or settings.EXAM_FANOUT_CONCURRENCY
+    queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(concurrency)
+    done = object()
+    errors = []
+
+    async def run_batch(index, prompt):
+        try:
+            async with semaphore:
+                stream = _raise_on_error(generate_questions_stream_async(prompt, request))
+                async for obj in iter_json_objects(stream):
+                    await queue.put(obj)
+        except Exception as e:
+            logger.error(f"❌ Fan-out batch {index + 1} failed: {e}")
+            errors.append(f"batch {index + 1}: {e}")
+        finally:
+            queue.put_nowait(done)
+
+    tasks = [asyncio.create_task(run_batch(i, p)) for i, p in enumerate(prompts)]
+    logger.info(f"🪭 Fan-out: {len(prompts)} batches, concurrency {concurrency}")
+
+    dedup = NearDuplicateFilter()
+    finished = 0
+    emitted = 0
+    try:
+        while finished < len(tasks):
+            obj = await queue.get()
+            if obj is done:
+                finished += 1
+                continue
+            question = validate_question(obj)
+            if question is None or not dedup.is_new(question):
+                continue
+            # The array is opened with the first question, so a total failure can still report an error
+            yield ("[" if not emitted else ",") + json.dumps(question, ensure_ascii=False)
+            emitted += 1
+        if emitted:
+            yield "]"
+        elif errors:
+            yield f"Error: all {len(tasks)} fan-out batches failed ({'; '.join(errors)})"
+        else:
+            yield "[]"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if errors:
+        logger.warning(f"⚠️ Fan-out: {len(errors)}/{len(tasks)} batches failed")
+    logger.info(f"🪭 Fan-out complete: {emitted} unique questions")
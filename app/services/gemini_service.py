@@ -1,27 +1,56 @@
+import json
+import logging
+import httpx
 from google import genai
+from google.genai import types
 from app.core.config import Settings
 
-client = genai.Client(api_key=Settings.GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
 
-def generate_questions_stream(prompt: str):
-    models_to_try = [
-        "gemini-2.5-flash", 
-       
-    ]
-    
+# One shared client for the whole process; the async surface (client.aio)
+# keeps a pooled httpx.AsyncClient so connections are reused across requests
+client = genai.Client(
+    api_key=Settings.GEMINI_API_KEY,
+    http_options=types.HttpOptions(
+        timeout=Settings.GEMINI_TIMEOUT_MS,
+        async_client_args={
+            "limits": httpx.Limits(
+                max_connections=Settings.GEMINI_MAX_CONNECTIONS,
+                max_keepalive_connections=Settings.GEMINI_MAX_KEEPALIVE,
+            ),
+        },
+    ),
+)
+
+models_to_try = [
+    "gemini-2.5-flash", 
+   
+]
+
+async def generate_questions_stream_async(prompt: str, request=None):
+    """
+    Streams the model's text chunk by chunk on the event loop, falling back
+    through `models_to_try` on quota errors. Pass the incoming `request` to
+    stop generating (and release the upstream connection) as soon as the
+    client disconnects.
+    """
     for model_id in models_to_try:
         try:
-            # FIX: Use generate_content_stream() instead of generate_content()
-            response_stream = client.models.generate_content_stream(
+            response_stream = await client.aio.models.generate_content_stream(
                 model=model_id,
                 contents=prompt
             )
-            
-            for chunk in response_stream:
-                # In the new SDK, use chunk.text to get the content
-                if chunk.text:
-                    yield chunk.text
-            return 
+
+            try:
+                async for chunk in response_stream:
+                    if request is not None and await request.is_disconnected():
+                        logger.info(f"🔌 Client disconnected, cancelling {model_id} generation")
+                        return
+                    if chunk.text:
+                        yield chunk.text
+            finally:
+                await response_stream.aclose()
+            return
 
         except Exception as e:
             error_msg = str(e)
@@ -30,4 +59,20 @@ def generate_questions_stream(prompt: str):
                 continue
             print(f"Gemini Error with {model_id}: {e}")
             yield f"Error: {e}"
-            return
\ No newline at end of file
+            return
+
+
+async def close_gemini_client():
+    await client.aio.aclose()
+
+
+def parse_llm_questions(text: str):
+    """Parses the model's JSON array output, tolerating stray markdown fences."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end == -1:
+        raise ValueError("No JSON array in model output")
+    return json.loads(text[start:end + 1])
@@ -0,0 +1,110 @@
+# app/services/generation_cache.py
+import asyncio
+import logging
+import random
+import threading
+import time
+from cachetools import LRUCache
+from app.core.config import settings
+from app.services.gemini_service import parse_llm_questions
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCache:
+    """
+    Exact-match cache of finished Gemini generations for /exam/generate.
+
+    Keys are the normalized request (topic, difficulty, total_questions,
+    sorted q_types). Each key holds a small pool of generations so that
+    "variety" mode can serve different papers for the same request.
+    - LRU eviction across keys (max_keys)
+    - TTL per stored generation
+    """
+
+    def __init__(self, max_keys: int, ttl_seconds: int, pool_size: int):
+        self._pools = LRUCache(maxsize=max_keys)
+        self._lock = threading.Lock()
+        self.ttl_seconds = ttl_seconds
+        self.pool_size = max(1, pool_size)
+
+    @staticmethod
+    def key(topic: str, difficulty: str, total_questions: int, q_types) -> tuple:
+        return (
+            " ".join(topic.lower().split()),
+            difficulty.strip().lower(),
+            int(total_questions),
+            tuple(sorted({t.strip() for t in q_types})),
+        )
+
+    def _fresh(self, key):
+        now = time.monotonic()
+        pool = [(ts, text) for ts, text in self._pools.get(key, []) if now - ts < self.ttl_seconds]
+        if pool:
+            self._pools[key] = pool
+        else:
+            self._pools.pop(key, None)
+        return pool
+
+    def get(self, key, variety: bool = False):
+        """Returns a cached generation, or None if the caller should generate live."""
+        with self._lock:
+            pool = self._fresh(key)
+        if not pool:
+            return None
+        if variety:
+            # Keep generating until the pool is full, then rotate through it
+            if len(pool) < self.pool_size:
+                return None
+            return random.choice(pool)[1]
+        return pool[-1][1]
+
+    def add(self, key, text: str):
+        with self._lock:
+            pool = self._fresh(key)
+            pool.append((time.monotonic(), text))
+            self._pools[key] = pool[-self.pool_size:]
+
+    async def record(self, key, stream, expected_count: int, request=None):
+        """
+        Passes `stream` through unchanged and stores the full text only if the
+        stream ran to the end for a connected client and the text is a JSON
+        array holding at least `expected_count` questions.
+        """
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+
+        # Generators stop early (and return normally) when the client goes away
+        if request is not None and await request.is_disconnected():
+            logger.warning("⚠️ Not caching generation cut short by client disconnect")
+            return
+
+        text = "".join(chunks)
+        try:
+            questions = parse_llm_questions(text)
+        except ValueError:
+            questions = None
+        if not isinstance(questions, list) or len(questions) < expected_count:
+            logger.warning(
+                f"⚠️ Not caching failed/incomplete generation "
+                f"({len(questions) if isinstance(questions, list) else 'no'} of {expected_count} questions)"
+            )
+            return
+        self.add(key, text)
+
+
+async def replay_stream(text: str, chunk_size: int = None):
+    """Re-streams a cached generation in chunks so clients see the same framing as a live one."""
+    chunk_size = chunk_size or settings.EXAM_CACHE_REPLAY_CHUNK
+    for i in range(0, len(text), chunk_size):
+        yield text[i:i + chunk_size]
+        await asyncio.sleep(0)
+
+
+generation_cache = GenerationCache(
+    max_keys=settings.EXAM_CACHE_MAX_KEYS,
+    ttl_seconds=settings.EXAM_CACHE_TTL_SECONDS,
+    pool_size=settings.EXAM_CACHE_VARIETY_POOL,
+)
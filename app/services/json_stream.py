@@ -0,0 +1,145 @@
+# app/services/json_stream.py
+import json
+import logging
+import re
+from pydantic import ValidationError
+from app.schemas.question import Question
+
+logger = logging.getLogger(__name__)
+
+# The only characters that can change the parser's state
+_SPECIAL_CHARS = re.compile(r'[{}"\\]')
+
+STREAM_MEDIA_TYPES = {
+    "text": "text/plain",
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for a streamed JSON array of objects.
+
+    feed() takes arbitrary text chunks and returns every top-level object
+    that was closed by that chunk. Anything outside an object (the
+    surrounding '[' / ']' / ',', markdown fences, stray prose) is ignored,
+    so a truncated or fenced response still yields its complete objects.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._parts = []
+        self.errors = 0
+
+    def feed(self, chunk: str):
+        objects = []
+        start = 0 if self._depth else None
+        skip_until = 1 if self._escape else 0
+        self._escape = False
+
+        for match in _SPECIAL_CHARS.finditer(chunk):
+            i = match.start()
+            if i < skip_until:
+                continue
+            ch = match.group()
+
+            if self._in_string:
+                if ch == "\\":
+                    # The next character is escaped, possibly in the next chunk
+                    skip_until = i + 2
+                    self._escape = i + 1 >= len(chunk)
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._parts = []
+                    start = i
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:i + 1])
+                    start = None
+                    try:
+                        objects.append(json.loads("".join(self._parts)))
+                    except ValueError:
+                        self.errors += 1
+                    self._parts = []
+
+        if self._depth and start is not None:
+            self._parts.append(chunk[start:])
+        return objects
+
+
+async def iter_json_objects(stream):
+    """Yields each complete object from a text stream carrying a JSON array."""
+    parser = JsonArrayStreamParser()
+    async for chunk in stream:
+        for obj in parser.feed(chunk):
+            yield obj
+    if parser.errors:
+        logger.warning(f"⚠️ Skipped {parser.errors} malformed object(s) in model output")
+
+
+def validate_question(obj):
+    """Returns the question normalized to the exam_prompt schema, or None if it does not conform."""
+    try:
+        return Question.model_validate(obj).model_dump(exclude_none=True)
+    except ValidationError as e:
+        logger.warning(f"⚠️ Dropping invalid question: {e.errors()[0]['msg']}")
+        return None
+
+
+def _frame(event: str, payload, stream_format: str) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def frame_questions(stream, stream_format: str = "ndjson"):
+    """
+    Re-frames a raw model stream as NDJSON lines or SSE events, one per
+    question, as soon as each object closes. Objects that do not match the
+    exam_prompt schema are dropped. A model error is reported as an "error"
+    frame, and SSE streams end with a "done" event.
+    """
+    count = 0
+    rejected = 0
+    error = None
+    parser = JsonArrayStreamParser()
+
+    async for chunk in stream:
+        if count == 0 and chunk.startswith("Error:"):
+            error = chunk
+            continue
+        for obj in parser.feed(chunk):
+            question = validate_question(obj)
+            if question is None:
+                rejected += 1
+                continue
+            count += 1
+            yield _frame("question", question, stream_format)
+
+    if error:
+        yield _frame("error", {"error": error}, stream_format)
+    if stream_format == "sse":
+        yield _frame("done", {"count": count, "rejected": rejected + parser.errors}, stream_format)
+
+
+def stream_questions(stream, stream_format: str = "text"):
+    """Picks the raw passthrough or a framed stream; returns (iterator, media_type)."""
+    if stream_format == "text":
+        return stream, STREAM_MEDIA_TYPES["text"]
+    return frame_questions(stream, stream_format), STREAM_MEDIA_TYPES[stream_format]
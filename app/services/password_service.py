@@ -0,0 +1,59 @@
+import asyncio
+import contextlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.security import verify_and_update_password
+
+logger = logging.getLogger(__name__)
+
+# Argon2 gets its own threads (argon2-cffi releases the GIL while hashing) so a
+# login burst cannot starve Starlette's shared threadpool
+_executor = None
+_pending_jobs = 0
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_POOL_WORKERS, thread_name_prefix="argon2"
+        )
+        logger.info(f"🔐 Password hashing pool started with {settings.PASSWORD_POOL_WORKERS} workers")
+    return _executor
+
+
+def shutdown_password_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+@contextlib.asynccontextmanager
+async def _pool_slot():
+    """Reserves one of the PASSWORD_POOL_MAX_PENDING slots, or fails fast with 429."""
+    global _pending_jobs
+    if _pending_jobs >= settings.PASSWORD_POOL_MAX_PENDING:
+        logger.warning(f"🚦 Password pool saturated ({_pending_jobs} pending), rejecting login")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts right now, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    _pending_jobs += 1
+    try:
+        yield get_password_executor()
+    finally:
+        _pending_jobs -= 1
+
+
+async def verify_password_async(raw_password: str, hashed_password: str):
+    """(valid, new_hash) computed on the password pool; see security.verify_and_update_password."""
+    async with _pool_slot() as executor:
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, verify_and_update_password, raw_password, hashed_password
+        )
+
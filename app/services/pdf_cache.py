@@ -0,0 +1,83 @@
+# app/services/pdf_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+from cachetools import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the shape of a cached entry changes so stale disk files are ignored
+CACHE_VERSION = 3
+
+
+class PdfTextCache:
+    """
+    Content-addressed cache for parsed PDF text.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes plus a `kind`
+    (e.g. "text" for the PyMuPDF dump, "pyq_pages" for the marked pages),
+    so the same paper uploaded twice is only ever parsed once.
+    - Tier 1: size-bounded in-memory LRU
+    - Tier 2: optional JSON files on disk (survives restarts)
+    """
+
+    def __init__(self, max_entries: int, disk_dir=None):
+        self._memory = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def key(pdf_bytes: bytes) -> str:
+        return hashlib.sha256(pdf_bytes).hexdigest()
+
+    def _disk_path(self, key: str, kind: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.{kind}.v{CACHE_VERSION}.json")
+
+    def get(self, key: str, kind: str):
+        entry_key = f"{kind}:{key}"
+        with self._lock:
+            value = self._memory.get(entry_key)
+        if value is not None or not self.disk_dir:
+            return value
+
+        path = self._disk_path(key, kind)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable PDF cache file {path}: {e}")
+            return None
+
+        # Promote disk hits into memory
+        with self._lock:
+            self._memory[entry_key] = value
+        return value
+
+    def set(self, key: str, kind: str, value):
+        with self._lock:
+            self._memory[f"{kind}:{key}"] = value
+        if not self.disk_dir:
+            return
+
+        # Write to a temp file first so readers never see a half-written entry
+        path = self._disk_path(key, kind)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write PDF cache file {path}: {e}")
+
+
+pdf_cache = PdfTextCache(
+    max_entries=settings.PDF_CACHE_MAX_ENTRIES,
+    disk_dir=settings.PDF_CACHE_DIR if settings.PDF_CACHE_DISK else None,
+)
@@ -1,9 +1,260 @@
 # app/services/pdf_service.py
+import asyncio
+import contextlib
+import io
+import logging
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
+import pdfplumber
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.services.pdf_cache import pdf_cache
 
-def extract_text_from_pdf(file_bytes):
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Cleans extracted PDF text for better LLM parsing."""
+    text = re.sub(r'\n{2,}', '\n', text)
+    text = re.sub(r'[ \t]{2,}', ' ', text)
+    text = re.sub(r'\s+\n', '\n', text)
+    return text.strip()
+
+QUESTION_START_REGEX = re.compile(
+    r'(?m)^(Q\.\d+|\d+[\.\)\s])'
+)
+
+QUESTION_MARKER = "@@QUESTION_START@@"
+
+def mark_question_starts(text: str, first_index: int = 1) -> str:
+    """
+    Marks each question with:
+    - @@QUESTION_START@@
+    - @@QIDX:<global_index>@@
+    Works with SSC PDFs where numbering may be 'Q.1', '1.', '1)', or just '1 '
+    Pass `first_index` to continue the global numbering from a previous page.
+    """
+    pattern = re.compile(
+        r'(?m)^(?:\s*Q\.\s*|\s*)(\d{1,3})[\.\)]?\s+'
+    )
+
+    counter = first_index - 1
+
+    def replacer(match):
+        nonlocal counter
+        counter += 1
+        printed_num = match.group(1)
+        return f"\n@@QUESTION_START@@ @@QIDX:{counter}@@ Q.{printed_num} "
+
+    return pattern.sub(replacer, text)
+
+
+# -------------------------------
+# Page parsers (run inside worker processes)
+# -------------------------------
+
+def _parse_fitz_pages(file_bytes, start=0, stop=None):
+    """Raw PyMuPDF text for pages [start, stop) with per-page timings."""
+    results = []
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        stop = doc.page_count if stop is None else stop
+        for i in range(start, stop):
+            t0 = time.perf_counter()
+            text = doc[i].get_text()
+            results.append({
+                "page": i + 1,
+                "text": text,
+                "ms": round((time.perf_counter() - t0) * 1000, 2),
+            })
+    return results
+
+
+def _parse_pyq_pages(file_bytes, start=0, stop=None):
+    """Normalized pdfplumber text for pages [start, stop). Marking happens in page order later."""
+    results = []
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        pages = pdf.pages[start:stop]
+        for offset, page in enumerate(pages):
+            t0 = time.perf_counter()
+            text = page.extract_text()
+            page_text = normalize_text(text) if text else ""
+            results.append({
+                "page": start + offset + 1,
+                "text": page_text,
+                "ms": round((time.perf_counter() - t0) * 1000, 2),
+            })
+    return results
+
+
+def _page_count(file_bytes) -> int:
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        return doc.page_count
+
+
+# -------------------------------
+# Process pool with backpressure
+# -------------------------------
+
+_executor = None
+_pending_jobs = 0
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.PDF_POOL_WORKERS)
+        logger.info(f"🧵 PDF process pool started with {settings.PDF_POOL_WORKERS} workers")
+    return _executor
+
+
+def shutdown_pdf_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _page_ranges(page_count: int, parts: int):
+    size = max(1, -(-page_count // max(1, parts)))  # ceil division
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+@contextlib.asynccontextmanager
+async def _pool_slot():
+    """Reserves one of the PDF_POOL_MAX_PENDING document slots, or fails fast with 503."""
+    global _pending_jobs
+    if _pending_jobs >= settings.PDF_POOL_MAX_PENDING:
+        logger.warning(f"🚦 PDF pool saturated ({_pending_jobs} jobs pending), rejecting upload")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="PDF parser is busy, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+
+    _pending_jobs += 1
+    try:
+        yield get_pdf_executor()
+    finally:
+        _pending_jobs -= 1
+
+
+async def _parse_in_pool(parser, file_bytes, *parser_args):
+    """
+    Splits the document into contiguous page ranges and parses them in parallel.
+    `parser(file_bytes, start, stop, *parser_args)` returns one dict per page with an "ms" timing.
+    """
+    async with _pool_slot() as executor:
+        loop = asyncio.get_running_loop()
+        page_count = await loop.run_in_executor(executor, _page_count, file_bytes)
+        futures = [
+            loop.run_in_executor(executor, parser, file_bytes, start, stop, *parser_args)
+            for start, stop in _page_ranges(page_count, settings.PDF_POOL_WORKERS)
+        ]
+        chunks = await asyncio.gather(*futures)
+
+    pages = [page for chunk in chunks for page in chunk]
+    timings = [{"page": p["page"], "ms": p.pop("ms")} for p in pages]
+    return pages, timings
+
+
+def server_timing_header(timings) -> dict:
+    """Builds a Server-Timing header from per-page parse timings (empty on cache hits)."""
+    if not timings:
+        return {"Server-Timing": "pdf;desc=\"cache\";dur=0"}
+    total = sum(t["ms"] for t in timings)
+    slowest = max(timings, key=lambda t: t["ms"])
+    return {
+        "Server-Timing": (
+            f"pdf;desc=\"{len(timings)} pages\";dur={total:.2f}, "
+            f"pdf-slowest;desc=\"page {slowest['page']}\";dur={slowest['ms']:.2f}"
+        )
+    }
+
+
+# -------------------------------
+# Public API
+# -------------------------------
+
+async def extract_text_from_pdf_async(file_bytes):
+    """Full text of the PDF, parsed in the process pool and cached by content hash. Returns (text, timings)."""
+    key = pdf_cache.key(file_bytes)
+    cached = pdf_cache.get(key, "text")
+    if cached is not None:
+        return cached, []
+
+    pages, timings = await _parse_in_pool(_parse_fitz_pages, file_bytes)
+    text = "".join(p["text"] for p in pages)
+    logger.info(f"⏱️ PDF text parsed | per-page ms: {[t['ms'] for t in timings]}")
+
+    pdf_cache.set(key, "text", text)
+    return text, timings
+
+
+async def iter_pyq_pages(file_bytes, timings=None):
+    """
+    Lazily yields the non-empty pages of a PYQ paper, in order, as
+    {"page": <1-based number>, "text": <normalized>, "marked": <with question markers>}.
+
+    Pages are parsed in small ranges on the process pool, a few ranges ahead
+    of the consumer, so a caller that stops early (e.g. once it has enough
+    questions) never pays for the rest of the document. Whatever prefix was
+    parsed is cached, and later requests resume from where parsing stopped.
+    QIDX numbering is global across pages.
+    """
+    key = pdf_cache.key(file_bytes)
+    entry = pdf_cache.get(key, "pyq_pages")
+    if entry is None:
+        entry = {"pages": [], "next_page": 0, "next_qidx": 1, "page_count": None, "complete": False}
+
+    for page in entry["pages"]:
+        yield page
+    if entry["complete"]:
+        return
+
+    pages = list(entry["pages"])
+    next_page = entry["next_page"]
+    next_qidx = entry["next_qidx"]
+    page_count = entry["page_count"]
+    try:
+        async with _pool_slot() as executor:
+            loop = asyncio.get_running_loop()
+            if page_count is None:
+                page_count = await loop.run_in_executor(executor, _page_count, file_bytes)
+
+            step = settings.PDF_STREAM_PAGES_PER_TASK
+            ranges = [(start, min(start + step, page_count)) for start in range(next_page, page_count, step)]
+            window = settings.PDF_POOL_WORKERS
+            for w in range(0, len(ranges), window):
+                futures = [
+                    loop.run_in_executor(executor, _parse_pyq_pages, file_bytes, start, stop)
+                    for start, stop in ranges[w:w + window]
+                ]
+                try:
+                    for future in futures:
+                        for page in await future:
+                            ms = page.pop("ms")
+                            if timings is not None:
+                                timings.append({"page": page["page"], "ms": ms})
+                            next_page = page["page"]
+                            if not page["text"]:
+                                continue
+
+                            page["marked"] = mark_question_starts(page["text"], next_qidx)
+                            next_qidx += page["marked"].count(QUESTION_MARKER)
+                            pages.append(page)
+                            yield page
+                finally:
+                    for future in futures:
+                        future.cancel()
+    finally:
+        # Cache whatever prefix was fully parsed, even if the consumer stopped early
+        if next_page > entry["next_page"] or page_count != entry["page_count"]:
+            pdf_cache.set(key, "pyq_pages", {
+                "pages": pages,
+                "next_page": next_page,
+                "next_qidx": next_qidx,
+                "page_count": page_count,
+                "complete": page_count is not None and next_page >= page_count,
+            })
@@ -0,0 +1,191 @@
+# app/services/pyq_service.py
+import re
+from contextlib import aclosing
+from app.services.pdf_service import QUESTION_MARKER
+
+# Matches the header written by mark_question_starts
+BLOCK_HEADER_REGEX = re.compile(r'@@QIDX:(\d+)@@\s*Q\.(\d+)')
+QIDX_REGEX = re.compile(r'@@QIDX:\d+@@')
+
+
+def _continues_question(current, text: str, label, statement_label) -> bool:
+    """
+    True if a numbered line is a statement inside the open question
+    ("Consider the following: 1. ... 2. ...") rather than a new question.
+    That is the case while the question has no options yet and the number
+    does not move past it: a reset or non-increasing label, or the next
+    number in a run of statements already taken in.
+    """
+    if label is None or current["label"] is None or _has_options(text):
+        return False
+    return label <= current["label"] or (statement_label is not None and label == statement_label + 1)
+
+
+def _unmark(chunk: str, label) -> str:
+    """Puts a wrongly marked statement back as plain "n. text"."""
+    chunk = chunk.strip()
+    header = BLOCK_HEADER_REGEX.match(chunk)
+    return f"{label}. {chunk[header.end():].lstrip()}" if header else chunk
+
+
+async def iter_question_blocks(pages):
+    """
+    Turns a stream of marked pages into a stream of question blocks:
+    {"qidx": <global index>, "label": <printed number>, "page": <page number>, "text": <marked text>}
+
+    A block is yielded as soon as the next marker (or the end of the
+    document) closes it, so consumers can stop reading pages early.
+    Numbered statements inside a question are folded back into it, so each
+    block is one question, and QIDX is renumbered to count questions only.
+    Text before the first marker (cover page, instructions) is dropped.
+    Closing this generator also closes `pages`.
+    """
+    current = None
+    parts = []
+    statement_label = None
+    qidx = 0
+
+    async with aclosing(pages):
+        async for page in pages:
+            chunks = page["marked"].split(QUESTION_MARKER)
+
+            # Anything before the first marker on a page continues the previous question
+            if current is not None and chunks[0].strip():
+                parts.append("\n" + chunks[0])
+
+            for chunk in chunks[1:]:
+                header = BLOCK_HEADER_REGEX.match(chunk.strip())
+                label = int(header.group(2)) if header else None
+
+                if current is not None and _continues_question(current, "".join(parts), label, statement_label):
+                    parts.append("\n" + _unmark(chunk, label))
+                    statement_label = label
+                    continue
+
+                if current is not None:
+                    current["text"] = "".join(parts).strip()
+                    yield current
+
+                if header:
+                    qidx += 1
+                    chunk = QIDX_REGEX.sub(f"@@QIDX:{qidx}@@", chunk, count=1)
+                current = {
+                    "qidx": qidx if header else None,
+                    "label": label,
+                    "page": page["page"],
+                }
+                parts = [QUESTION_MARKER, chunk]
+                statement_label = None
+
+    if current is not None:
+        current["text"] = "".join(parts).strip()
+        yield current
+
+
+async def collect_question_window(blocks, start_at: int, limit: int):
+    """
+    Reads `blocks` until `limit` blocks starting at QIDX `start_at` are
+    collected, then stops (and closes the stream). Each block is already
+    closed by the next marker, so the last one is complete.
+
+    Returns (window, detected_labels); the window is empty if the anchor is missing.
+    """
+    window = []
+    detected_labels = []
+
+    async with aclosing(blocks):
+        async for block in blocks:
+            if block["label"] is not None:
+                detected_labels.append(block["label"])
+            if block["qidx"] is None or block["qidx"] < start_at:
+                continue
+            window.append(block)
+            if len(window) >= limit:
+                break
+
+    if window and window[0]["qidx"] != start_at:
+        window = []
+    return window, detected_labels
+
+
+# -------------------------------
+# Rule-based MCQ parser
+# -------------------------------
+
+QUESTION_HEADER_REGEX = re.compile(r'^@@QUESTION_START@@\s*@@QIDX:\d+@@\s*Q\.\d+\s*')
+
+# "(a) ...", "(A) ...", "(1) ..." anywhere, or "a) ..." / "A. ..." at the start of a line
+OPTION_LABEL_REGEX = re.compile(
+    r'(?:(?<=\s)|^)\(([a-dA-D1-4])\)\s*|(?m:^)[ \t]*([a-dA-D])[\.\)][ \t]+'
+)
+
+ANSWER_REGEX = re.compile(
+    r'(?im)^[ \t]*(?:Ans(?:wer)?|Correct\s+(?:Answer|Option))\s*[:.\-]?\s*\(?([a-dA-D1-4])\)?(?![\w])'
+)
+
+EXPLANATION_REGEX = re.compile(r'(?im)^[ \t]*(?:Explanation|Solution|Sol)\s*[:.\-]\s*')
+
+OPTION_ORDER = ["a", "b", "c", "d"]
+MAX_OPTION_CHARS = 250
+
+
+def _has_options(text: str) -> bool:
+    """Whether an option label the parser accepts ("(a)", "(1)", "a)", "A.") has started in `text`."""
+    return OPTION_LABEL_REGEX.search(text) is not None
+
+
+def _option_key(label: str) -> str:
+    label = label.lower()
+    return OPTION_ORDER[int(label) - 1] if label.isdigit() else label
+
+
+def parse_question_block(block):
+    """
+    Parses a marked "Q.n / four options / Ans" block without the LLM.
+
+    Returns (question, confidence). `question` has the same shape the
+    extraction prompt asks the model for, or None if the block does not
+    look like a well-formed MCQ.
+    """
+    body = QUESTION_HEADER_REGEX.sub("", block["text"]).strip()
+
+    # Split off "Ans: (b)" and any explanation after it
+    answer_key = None
+    explanation = ""
+    answer_match = ANSWER_REGEX.search(body)
+    if answer_match:
+        answer_key = _option_key(answer_match.group(1))
+        tail = body[answer_match.end():]
+        body = body[:answer_match.start()]
+        explanation_match = EXPLANATION_REGEX.search(tail)
+        if explanation_match:
+            explanation = " ".join(tail[explanation_match.end():].split())
+
+    labels = list(OPTION_LABEL_REGEX.finditer(body))
+    if len(labels) != 4:
+        return None, 0.0
+    keys = [_option_key(m.group(1) or m.group(2)) for m in labels]
+    if keys != OPTION_ORDER:
+        return None, 0.0
+
+    question_text = " ".join(body[:labels[0].start()].split())
+    options = [
+        " ".join(body[m.end():(labels[i + 1].start() if i + 1 < 4 else len(body))].split())
+        for i, m in enumerate(labels)
+    ]
+    if len(question_text) < 5 or not all(options):
+        return None, 0.0
+
+    # Answer is optional in the schema, but an explicit one raises confidence
+    confidence = 1.0 if answer_key else 0.85
+    if any(len(o) > MAX_OPTION_CHARS for o in options):
+        # An option swallowed something else (instructions, next section...)
+        confidence -= 0.3
+
+    return {
+        "question": question_text,
+        "options": options,
+        "answer": options[OPTION_ORDER.index(answer_key)] if answer_key else "",
+        "explanation": explanation if answer_key else "",
+    }, round(confidence, 2)
+
@@ -0,0 +1,201 @@
+# app/services/question_bank.py
+import hashlib
+import logging
+from cachetools import LRUCache
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.question_bank import BankQuestion
+from app.prompts.exam_prompt import exam_prompt
+from app.schemas.question import Question, QUESTION_TYPES
+from app.services.gemini_service import generate_questions_stream_async, parse_llm_questions
+
+logger = logging.getLogger(__name__)
+
+# (topic, difficulty, q_type) combinations currently being topped up on this event loop
+_topping_up = set()
+
+# Repeat-request counts for (topic, difficulty) outside QUESTION_BANK_TOPICS
+_demand = LRUCache(maxsize=4096)
+
+
+class QuestionBank:
+    """
+    Stock of pre-generated questions per topic × difficulty × type.
+    /exam/generate assembles exams from here and only falls back to live
+    generation when the bank cannot cover the whole request.
+    """
+
+    @staticmethod
+    def normalize_topic(topic: str) -> str:
+        return " ".join(topic.lower().split())
+
+    @staticmethod
+    def fingerprint(question: dict) -> str:
+        text = " ".join(str(question.get("question", "")).lower().split())
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def split_quota(total: int, q_types) -> dict:
+        """Spreads `total` questions across the requested types as evenly as possible."""
+        quota = {t: total // len(q_types) for t in q_types}
+        for t in q_types[:total % len(q_types)]:
+            quota[t] += 1
+        return quota
+
+    @staticmethod
+    async def stock(db, topic: str, difficulty: str, q_type: str) -> int:
+        return await db.scalar(
+            select(func.count(BankQuestion.id)).where(
+                BankQuestion.topic == QuestionBank.normalize_topic(topic),
+                BankQuestion.difficulty == difficulty.lower(),
+                BankQuestion.q_type == q_type
+            )
+        )
+
+    @staticmethod
+    async def take(db, topic: str, difficulty: str, q_types, total: int):
+        """
+        Returns `total` questions interleaved across `q_types`, preferring the
+        least-served ones, or None if any type is short of stock.
+        """
+        q_types = list(dict.fromkeys(q_types))
+        if not q_types or any(t not in QUESTION_TYPES for t in q_types):
+            return None
+
+        picked = {}
+        for q_type, count in QuestionBank.split_quota(total, q_types).items():
+            result = await db.execute(
+                select(BankQuestion).where(
+                    BankQuestion.topic == QuestionBank.normalize_topic(topic),
+                    BankQuestion.difficulty == difficulty.lower(),
+                    BankQuestion.q_type == q_type
+                ).order_by(BankQuestion.served_count, func.random()).limit(count)
+            )
+            rows = result.scalars().all()
+            if len(rows) < count:
+                return None
+            picked[q_type] = rows
+
+        for rows in picked.values():
+            for row in rows:
+                row.served_count += 1
+        await db.commit()
+
+        # Interleave types, as the live prompt asks the model to do
+        questions = []
+        for i in range(max(len(rows) for rows in picked.values())):
+            for rows in picked.values():
+                if i < len(rows):
+                    questions.append(rows[i].payload)
+        return questions
+
+    @staticmethod
+    async def store(db, topic: str, difficulty: str, q_type: str, questions) -> int:
+        """Adds validated questions, skipping ones already in the bank. Returns how many were added."""
+        added = 0
+        for question in questions:
+            row = BankQuestion(
+                topic=QuestionBank.normalize_topic(topic),
+                difficulty=difficulty.lower(),
+                q_type=q_type,
+                fingerprint=QuestionBank.fingerprint(question),
+                payload=question
+            )
+            try:
+                async with db.begin_nested():
+                    db.add(row)
+                added += 1
+            except IntegrityError:
+                pass  # duplicate question
+        await db.commit()
+        return added
+
+    @staticmethod
+    async def generate_batch(topic: str, difficulty: str, q_type: str, count: int):
+        """Generates `count` questions of one type and keeps only those that pass validation."""
+        prompt = exam_prompt(topic, difficulty, count, [q_type])
+        text = "".join([chunk async for chunk in generate_questions_stream_async(prompt)])
+        try:
+            raw_questions = parse_llm_questions(text)
+        except ValueError as e:
+            logger.error(f"❌ Bank generation for '{topic}'/{difficulty}/{q_type} returned invalid JSON: {e}")
+            return []
+
+        valid = []
+        for raw in raw_questions:
+            try:
+                question = Question.model_validate(raw)
+            except ValidationError:
+                continue
+            if question.type == q_type:
+                valid.append(question.model_dump(exclude_none=True))
+
+        logger.info(f"🏦 Generated {len(valid)}/{len(raw_questions)} valid '{q_type}' questions for '{topic}' ({difficulty})")
+        return valid
+
+    @staticmethod
+    async def top_up(topic: str, difficulty: str, q_types, target: int = None):
+        """
+        Generates questions until each (topic, difficulty, type) has `target` in stock.
+        Safe to call from a background task; concurrent calls for the same key are skipped.
+        """
+        target = target or settings.QUESTION_BANK_TARGET_STOCK
+        async with AsyncSessionLocal() as db:
+            try:
+                for q_type in dict.fromkeys(q_types):
+                    if q_type not in QUESTION_TYPES:
+                        continue
+                    key = (QuestionBank.normalize_topic(topic), difficulty.lower(), q_type)
+                    if key in _topping_up:
+                        continue
+                    _topping_up.add(key)
+                    try:
+                        missing = target - await QuestionBank.stock(db, topic, difficulty, q_type)
+                        while missing > 0:
+                            batch = await QuestionBank.generate_batch(
+                                topic, difficulty, q_type, min(missing, settings.QUESTION_BANK_BATCH_SIZE)
+                            )
+                            added = await QuestionBank.store(db, topic, difficulty, q_type, batch)
+                            if added == 0:
+                                break  # model keeps failing or repeating itself; try again next round
+                            missing -= added
+                    finally:
+                        _topping_up.discard(key)
+            except Exception as e:
+                logger.error(f"❌ Question bank top-up failed for '{topic}': {e}")
+                await db.rollback()
+
+    @staticmethod
+    def wants_top_up(topic: str, difficulty: str) -> bool:
+        """
+        Records one repeat request and says whether the API may schedule a
+        top-up for it. Configured topics always may; any other topic only
+        after QUESTION_BANK_DEMAND_THRESHOLD repeats, so one-off or misspelled
+        topics never trigger bulk generation.
+        """
+        topic = QuestionBank.normalize_topic(topic)
+        if topic in {QuestionBank.normalize_topic(t) for t in settings.QUESTION_BANK_TOPICS}:
+            return True
+        key = (topic, difficulty.lower())
+        _demand[key] = _demand.get(key, 0) + 1
+        return _demand[key] >= settings.QUESTION_BANK_DEMAND_THRESHOLD
+
+    @staticmethod
+    async def needs_top_up(db, topic: str, difficulty: str, q_types) -> bool:
+        for q_type in dict.fromkeys(q_types):
+            if q_type in QUESTION_TYPES and await QuestionBank.stock(db, topic, difficulty, q_type) < settings.QUESTION_BANK_LOW_WATER:
+                return True
+        return False
+
+    @staticmethod
+    async def known_combinations(db, min_served: int):
+        """(topic, difficulty, q_type) in the bank whose questions have been served at least `min_served` times."""
+        result = await db.execute(
+            select(BankQuestion.topic, BankQuestion.difficulty, BankQuestion.q_type)
+            .group_by(BankQuestion.topic, BankQuestion.difficulty, BankQuestion.q_type)
+            .having(func.sum(BankQuestion.served_count) >= min_served)
+        )
+        return result.all()
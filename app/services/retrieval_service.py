@@ -0,0 +1,193 @@
+# app/services/retrieval_service.py
+import hashlib
+import logging
+import re
+import threading
+import numpy as np
+from cachetools import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]{2,}")
+
+# Too common to say anything about what a passage covers
+STOPWORDS = frozenset("""
+the of and to in is for on that by with as at from this be are was were or an it its which
+their they he she his her we our you your not but have has had been will would can could may
+also into than then there these those such other more most some any all each one two per
+""".split())
+
+
+def tokenize(text: str):
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def _split_long_line(line: str, target_chars: int):
+    """Cuts a line longer than `target_chars` into pieces of at most that size, at a space where possible."""
+    while len(line) > target_chars:
+        cut = line.rfind(" ", target_chars // 2, target_chars)
+        cut = cut if cut > 0 else target_chars
+        yield line[:cut]
+        line = line[cut:].lstrip()
+    if line:
+        yield line
+
+
+def chunk_passages(text: str, target_chars: int):
+    """
+    Groups consecutive lines into passages of at most `target_chars`, keeping
+    document order. Lines longer than that (or text with no newlines at all)
+    are hard-split first.
+    """
+    passages, current, size = [], [], 0
+    for raw_line in text.split("\n"):
+        if not raw_line.strip():
+            continue
+        for line in _split_long_line(raw_line, target_chars):
+            if current and size + len(line) > target_chars:
+                passages.append("\n".join(current))
+                current, size = [], 0
+            current.append(line)
+            size += len(line) + 1
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+class BM25Index:
+    """
+    BM25 over one document's passages, stored as flat sparse postings
+    (passage, term, tf) sorted by term so each query term is one slice.
+    """
+
+    def __init__(self, passages, k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        vocab = {}
+        doc_ids, term_ids = [], []
+        lengths = np.zeros(len(passages))
+        for i, passage in enumerate(passages):
+            tokens = tokenize(passage)
+            lengths[i] = len(tokens)
+            doc_ids.extend([i] * len(tokens))
+            term_ids.extend(vocab.setdefault(t, len(vocab)) for t in tokens)
+        self.vocab = vocab
+
+        # Collapse (passage, term) occurrences into term frequencies, ordered by term
+        pairs = np.asarray(term_ids, dtype=np.int64) * len(passages) + np.asarray(doc_ids, dtype=np.int64)
+        pairs, tf = np.unique(pairs, return_counts=True)
+        self.post_terms = pairs // max(len(passages), 1)
+        self.post_docs = pairs % max(len(passages), 1)
+        self.post_tf = tf.astype(float)
+        self.term_starts = np.searchsorted(self.post_terms, np.arange(len(vocab) + 1))
+
+        df = np.diff(self.term_starts).astype(float)
+        n = len(passages)
+        self.idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        self.norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1)) if n else lengths
+
+        # Whole-document term frequencies, for picking the document's own key terms
+        self.doc_tf = np.bincount(self.post_terms, weights=self.post_tf, minlength=len(vocab))
+
+    def key_terms(self, count: int):
+        """Terms that are frequent in the document but concentrated in few passages."""
+        weights = self.doc_tf * self.idf
+        top = np.argsort(weights)[::-1][:count]
+        return top[weights[top] > 0]
+
+    def score(self, term_ids) -> np.ndarray:
+        scores = np.zeros(len(self.passages))
+        for t in np.unique(term_ids):
+            start, stop = self.term_starts[t], self.term_starts[t + 1]
+            docs, tf = self.post_docs[start:stop], self.post_tf[start:stop]
+            scores[docs] += self.idf[t] * tf * (self.k1 + 1) / (tf + self.norm[docs])
+        return scores
+
+    def query_terms(self, query: str):
+        return np.asarray([self.vocab[t] for t in tokenize(query) if t in self.vocab], dtype=np.int64)
+
+
+def select_passages(index: BM25Index, scores: np.ndarray, budget_chars: int, sections: int):
+    """
+    Best passages that fit `budget_chars`, spread across the document. The
+    document is cut into `sections` equal runs of passages; each round takes
+    the best remaining passage from every section, as long as it scores within
+    reach of the overall best. Leftover budget then goes to the highest
+    remaining scores wherever they are. Returns passage indices in document order.
+    """
+    n = len(index.passages)
+    if n == 0:
+        return []
+    floor = scores.max() * settings.RETRIEVAL_MIN_RELATIVE_SCORE
+    bounds = np.linspace(0, n, min(sections, n) + 1).astype(int)
+    queues = [
+        [i for i in start + np.argsort(-scores[start:stop], kind="stable") if scores[i] >= floor]
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+
+    chosen, used = set(), 0
+
+    def take(i):
+        nonlocal used
+        size = len(index.passages[i]) + 2
+        if i in chosen or used + size > budget_chars:
+            return False
+        chosen.add(i)
+        used += size
+        return True
+
+    # 1. Coverage: round-robin over sections, strongest sections first
+    while any(queues) and used < budget_chars:
+        queues.sort(key=lambda q: -scores[q[0]] if q else 0)
+        for queue in queues:
+            while queue and not take(queue.pop(0)):
+                pass
+
+    # 2. Relevance: fill what is left in plain score order
+    for i in np.argsort(-scores, kind="stable"):
+        if used >= budget_chars:
+            break
+        take(i)
+    return sorted(chosen)
+
+
+_indexes = LRUCache(maxsize=settings.RETRIEVAL_INDEX_CACHE)
+_indexes_lock = threading.Lock()
+
+
+def get_index(text: str) -> BM25Index:
+    """One index per distinct document, reused across requests."""
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _indexes_lock:
+        index = _indexes.get(key)
+    if index is None:
+        index = BM25Index(chunk_passages(text, settings.RETRIEVAL_PASSAGE_CHARS))
+        with _indexes_lock:
+            _indexes[key] = index
+    return index
+
+
+def select_context(text: str, budget_tokens: int = None, focus: str = None):
+    """
+    Picks the passages of `text` that best fit a prompt budget of `budget_tokens`.
+    Ranked by BM25 against `focus` when given, otherwise against the document's
+    own key terms. Returns (context, passages_used, passages_total).
+    """
+    budget_chars = (budget_tokens or settings.RETRIEVAL_TOKEN_BUDGET) * settings.RETRIEVAL_CHARS_PER_TOKEN
+    if len(text) <= budget_chars:
+        return text, None, None
+
+    index = get_index(text)
+    terms, ranked_by = (index.query_terms(focus) if focus else np.empty(0, dtype=np.int64)), "focus"
+    if len(terms) == 0:
+        terms, ranked_by = index.key_terms(settings.RETRIEVAL_KEY_TERMS), "key terms"
+    chosen = select_passages(index, index.score(terms), budget_chars, settings.RETRIEVAL_SECTIONS)
+    if not chosen:
+        # Nothing fit (no usable passages): never hand the prompt an empty context
+        logger.warning(f"⚠️ No passage fits {budget_chars} chars, falling back to the start of the document")
+        return text[:budget_chars], 0, len(index.passages)
+
+    logger.info(f"🔎 Selected {len(chosen)}/{len(index.passages)} passages (by {ranked_by})")
+    return "\n\n".join(index.passages[i] for i in chosen), len(chosen), len(index.passages)
@@ -0,0 +1,124 @@
+import logging
+import queue
+import select
+import time
+from sqlalchemy import event, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres LISTEN/NOTIFY channel carrying the id of a task whose due date/status changed
+TASK_CHANNEL = "task_changes"
+
+# Stand-in for the channel when the database is not Postgres (tests, local SQLite).
+# Only fed while a QueueTaskListener in this process reads it, and bounded in
+# case that reader stalls; dropped ids are picked up by the reconciliation sweep.
+local_task_events = queue.Queue(maxsize=10000)
+_local_listeners = set()
+
+
+# Match NOTIFY semantics for the local queue: publish on commit, drop on rollback
+@event.listens_for(Session, "after_commit")
+def _publish_local_events(session):
+    for task_id in session.info.pop("task_events", ()):
+        try:
+            local_task_events.put_nowait(task_id)
+        except queue.Full:
+            logger.warning("⚠️ Local task event queue is full, dropping events until the scheduler catches up")
+            return
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_local_events(session):
+    session.info.pop("task_events", None)
+
+
+async def notify_task_changed(db, task_id: int):
+    """
+    Tells the reminder scheduler that a task changed. On Postgres the NOTIFY is
+    transactional: it is delivered on commit and dropped on rollback.
+    """
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(sql_select(func.pg_notify(TASK_CHANNEL, str(task_id))))
+    elif _local_listeners:
+        # Without Postgres only a scheduler running in this same process can hear it
+        db.sync_session.info.setdefault("task_events", []).append(task_id)
+
+
+class QueueTaskListener:
+    """Reads task changes from an in-process queue (tests, SQLite)."""
+
+    def __init__(self, events=None):
+        self.events = events or local_task_events
+        if self.events is local_task_events:
+            _local_listeners.add(self)
+
+    def poll(self, timeout):
+        """Waits up to `timeout` seconds; returns the ids of changed tasks (maybe empty)."""
+        task_ids = []
+        try:
+            task_ids.append(self.events.get(timeout=max(timeout, 0)))
+            while True:
+                task_ids.append(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        return task_ids
+
+    def close(self):
+        _local_listeners.discard(self)
+
+
+class PostgresTaskListener:
+    """LISTENs on TASK_CHANNEL over a dedicated connection, outside the engine's pool."""
+
+    def __init__(self, database_url):
+        import psycopg2
+
+        self._psycopg2 = psycopg2
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.conn = None
+
+    def _connect(self):
+        self.conn = self._psycopg2.connect(self.dsn)
+        self.conn.set_session(autocommit=True)
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {TASK_CHANNEL}")
+        logger.info(f"👂 Listening for task changes on '{TASK_CHANNEL}'")
+
+    def poll(self, timeout):
+        """Waits up to `timeout` seconds; returns the ids of changed tasks (maybe empty)."""
+        try:
+            if self.conn is None or self.conn.closed:
+                self._connect()
+            if select.select([self.conn], [], [], max(timeout, 0)) == ([], [], []):
+                return []
+            self.conn.poll()
+        except self._psycopg2.Error as e:
+            # Notifications sent while disconnected are lost; the reconciliation sweep covers them
+            logger.error(f"❌ Task change listener lost its connection: {e}")
+            self.close()
+            time.sleep(min(max(timeout, 0), 5))
+            return []
+
+        task_ids = []
+        while self.conn.notifies:
+            payload = self.conn.notifies.pop(0).payload
+            if payload.isdigit():
+                task_ids.append(int(payload))
+        return task_ids
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            finally:
+                self.conn = None
+
+
+def make_task_listener():
+    if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql":
+        return PostgresTaskListener(settings.DATABASE_URL)
+    return QueueTaskListener()
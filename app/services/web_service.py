@@ -1,23 +1,202 @@
+import codecs
+import logging
+import threading
+from html.parser import HTMLParser
 import httpx
 from bs4 import BeautifulSoup
+from cachetools import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+# -------------------------------
+# Shared pooled client
+# -------------------------------
+
+_client = None
+
+
+def get_web_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=headers,
+            follow_redirects=True,
+            timeout=httpx.Timeout(settings.WEB_TIMEOUT_SECONDS, connect=settings.WEB_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.WEB_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WEB_MAX_KEEPALIVE
+            )
+        )
+    return _client
+
+
+async def close_web_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# -------------------------------
+# Conditional-GET text cache
+# -------------------------------
+
+class WebTextCache:
+    """
+    Extracted text per URL together with the validators it was served with.
+    Entries are never trusted blindly: each hit is revalidated with
+    If-None-Match / If-Modified-Since and reused only on a 304.
+    """
+
+    def __init__(self, max_entries: int):
+        self._entries = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+
+    def get(self, url: str):
+        with self._lock:
+            return self._entries.get(url)
+
+    def set(self, url: str, response: httpx.Response, text: str):
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if not (etag or last_modified) or "no-store" in response.headers.get("cache-control", ""):
+            return  # nothing to revalidate with
+        with self._lock:
+            self._entries[url] = {"etag": etag, "last_modified": last_modified, "text": text}
+
+    @staticmethod
+    def conditional_headers(entry) -> dict:
+        if entry is None:
+            return {}
+        conditional = {}
+        if entry["etag"]:
+            conditional["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            conditional["If-Modified-Since"] = entry["last_modified"]
+        return conditional
+
+
+web_cache = WebTextCache(settings.WEB_CACHE_MAX_ENTRIES)
+
+
+# -------------------------------
+# HTML -> text
+# -------------------------------
+
+def clean_text(text: str) -> str:
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+
+def html_to_text(html: str) -> str:
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.extract()
+
+    # Get text and clean up whitespace
+    return clean_text(soup.get_text())
+
+
+class BudgetTextParser(HTMLParser):
+    """
+    Streaming HTML-to-text (stdlib parser, no tree). Fed chunk by chunk while
+    downloading; `full` flips once `budget` characters of visible text are
+    collected, so the caller can stop reading and parsing right there.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+    BLOCK_TAGS = {
+        "p", "div", "br", "li", "ul", "ol", "tr", "td", "th", "table", "section", "article",
+        "header", "footer", "main", "aside", "nav", "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6",
+    }
+
+    def __init__(self, budget: int):
+        super().__init__(convert_charrefs=True)
+        self.budget = budget
+        self.parts = []
+        self.size = 0
+        self._skip_depth = 0
+
+    @property
+    def full(self) -> bool:
+        return self.size >= self.budget
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth or self.full:
+            return
+        if data.strip():
+            self.parts.append(data)
+            self.size += len(data)
+
+    def text(self) -> str:
+        return clean_text("".join(self.parts))
+
+
+# -------------------------------
+# Public API
+# -------------------------------
+
 async def extract_text_from_url(url: str):
-    async with httpx.AsyncClient(headers=headers) as client:
-        response = await client.get(url, follow_redirects=True)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.extract()
-
-        # Get text and clean up whitespace
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        
-        return text[:12000] # Return a safe chunk for Gemini
\ No newline at end of file
+    budget = settings.WEB_TEXT_BUDGET
+    cached = web_cache.get(url)
+
+    async with get_web_client().stream("GET", url, headers=WebTextCache.conditional_headers(cached)) as response:
+        if response.status_code == 304 and cached is not None:
+            logger.info(f"🌐 Not modified, reusing extracted text for {url}")
+            return cached["text"]
+        response.raise_for_status()
+
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        fast = BudgetTextParser(budget) if settings.WEB_FAST_HTML else None
+        body = []
+        received = 0
+        truncated = False
+
+        # Read at most WEB_MAX_BYTES, and with the fast parser only until the text budget is full
+        async for chunk in response.aiter_bytes():
+            chunk = chunk[:settings.WEB_MAX_BYTES - received]
+            received += len(chunk)
+            decoded = decoder.decode(chunk)
+            if fast is not None:
+                fast.feed(decoded)
+                if fast.full:
+                    truncated = True
+                    break
+            else:
+                body.append(decoded)
+            if received >= settings.WEB_MAX_BYTES:
+                truncated = True
+                break
+
+    if fast is not None:
+        if not truncated:
+            fast.feed(decoder.decode(b"", final=True))
+            fast.close()
+        text = fast.text()
+    else:
+        text = html_to_text("".join(body) + decoder.decode(b"", final=True))
+    text = text[:budget] # Return a safe chunk for Gemini
+
+    logger.info(f"🌐 Fetched {received} bytes from {url}{' (stopped early)' if truncated else ''}, {len(text)} chars of text")
+    web_cache.set(url, response, text)
+    return text
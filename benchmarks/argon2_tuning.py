@@ -0,0 +1,81 @@
+"""
+Pick Argon2 time/memory cost for a target p99 login latency under a burst.
+
+For each (time_cost, memory_cost) pair, fires BURST verifications at once
+into a pool of PASSWORD_POOL_WORKERS threads (what /login does at exam start)
+and reports per-login latency including queueing. The strongest setting
+whose p99 fits the target is the one to put in ARGON2_TIME_COST /
+ARGON2_MEMORY_COST; existing hashes are upgraded on each user's next login.
+
+Usage:
+    TARGET_P99_MS=500 BURST=64 python -m benchmarks.argon2_tuning
+"""
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+
+TIME_COSTS = [1, 2, 3, 4]
+MEMORY_COSTS = [19_456, 32_768, 65_536]  # KiB
+PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+BURST = int(os.getenv("BURST", 64))
+TARGET_P99_MS = float(os.getenv("TARGET_P99_MS", 500))
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def burst_latencies(context, hashed, executor):
+    """Milliseconds from submission to completion for BURST simultaneous logins."""
+    def verify(submitted_at):
+        context.verify(PASSWORD, hashed)
+        return (time.perf_counter() - submitted_at) * 1000
+
+    futures = [executor.submit(verify, time.perf_counter()) for _ in range(BURST)]
+    return [future.result() for future in futures]
+
+
+def main():
+    print(f"Burst of {BURST} logins on {WORKERS} worker(s), parallelism={PARALLELISM}, target p99 {TARGET_P99_MS:.0f} ms")
+    print(f"{'time_cost':>9} | {'memory KiB':>10} | {'single ms':>9} | {'p50 ms':>8} | {'p99 ms':>8} | fits")
+    print("-" * 66)
+
+    best = None
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        for memory_cost in MEMORY_COSTS:
+            for time_cost in TIME_COSTS:
+                context = CryptContext(
+                    schemes=["argon2"],
+                    argon2__rounds=time_cost,
+                    argon2__memory_cost=memory_cost,
+                    argon2__parallelism=PARALLELISM
+                )
+                hashed = context.hash(PASSWORD)
+
+                t0 = time.perf_counter()
+                context.verify(PASSWORD, hashed)
+                single = (time.perf_counter() - t0) * 1000
+
+                samples = burst_latencies(context, hashed, executor)
+                p50, p99 = statistics.median(samples), percentile(samples, 99)
+                fits = p99 <= TARGET_P99_MS
+                if fits and (best is None or single > best[2]):
+                    best = (time_cost, memory_cost, single)
+                print(
+                    f"{time_cost:>9} | {memory_cost:>10} | {single:>9.1f} | "
+                    f"{p50:>8.1f} | {p99:>8.1f} | {'yes' if fits else 'no'}"
+                )
+
+    if best:
+        print(f"\nStrongest fit: ARGON2_TIME_COST={best[0]} ARGON2_MEMORY_COST={best[1]}")
+    else:
+        print("\nNothing fits: raise PASSWORD_POOL_WORKERS, lower BURST via PASSWORD_POOL_MAX_PENDING, or relax the target.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-request cost of authenticating a bearer token on the task endpoints.
+
+Compares:
+- jose:   python-jose decode + verify (the original dependency)
+- pyjwt:  PyJWT decode + verify (AUTH_JWT_BACKEND=pyjwt), if installed
+- cached: get_current_user_id with the token already verified
+
+Usage:
+    SECRET_KEY=... ALGORITHM=HS256 python -m benchmarks.auth_overhead
+"""
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from jose import jwt  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.security import create_token  # noqa: E402
+from app.core import deps  # noqa: E402
+
+CALLS = 20_000
+ROUNDS = 5
+
+
+def timed(fn):
+    """Median microseconds per call over ROUNDS rounds of CALLS calls."""
+    samples = []
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        for _ in range(CALLS):
+            fn()
+        samples.append((time.perf_counter() - t0) / CALLS * 1_000_000)
+    return statistics.median(samples)
+
+
+async def timed_async(fn):
+    samples = []
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        for _ in range(CALLS):
+            await fn()
+        samples.append((time.perf_counter() - t0) / CALLS * 1_000_000)
+    return statistics.median(samples)
+
+
+def main():
+    token = create_token(42)
+    results = {
+        "jose": timed(lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]))
+    }
+
+    try:
+        import jwt as pyjwt
+        results["pyjwt"] = timed(lambda: pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]))
+    except ImportError:
+        print("PyJWT not installed; skipping the pyjwt backend (pip install pyjwt)")
+
+    asyncio.run(deps.get_current_user_id(token))  # warm the cache
+    results["cached"] = asyncio.run(timed_async(lambda: deps.get_current_user_id(token)))
+
+    print(f"Algorithm: {settings.ALGORITHM}, {CALLS} calls x {ROUNDS} rounds")
+    print(f"{'backend':>10} | {'us/request':>10}")
+    print("-" * 25)
+    for name, micros in results.items():
+        print(f"{name:>10} | {micros:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Latency of the /api/stats read path for users with 10, 1k and 100k results.
+
+Compares:
+- legacy:    load every row, average in Python, slice the last 10
+- sql:       AVG/COUNT in SQL + ORDER BY created_at DESC LIMIT 10
+- aggregate: single user_stats row
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.stats_queries
+Defaults to a throwaway SQLite file when BENCH_DATABASE_URL is not set.
+Runs on the same async drivers as the API (asyncpg / aiosqlite).
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.models.result import ExamResult
+from app.models.user_stats import UserStats
+from app.repositories.result_repo import ResultRepository
+from app.repositories.stats_repo import StatsRepository
+
+SIZES = [10, 1_000, 100_000]
+REPEATS = 20
+
+
+async def seed(db, user_id, count):
+    start = datetime.utcnow() - timedelta(minutes=count)
+    rows = [
+        dict(
+            user_id=user_id, topic="bench", total_questions=100, attempted=90,
+            correct=i % 90, wrong=90 - i % 90, score=float(i % 100), accuracy=float(i % 100),
+            time_spent=600, sectional_breakdown={"gk": i % 25},
+            created_at=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    for i in range(0, count, 10_000):
+        await db.execute(insert(ExamResult), rows[i:i + 10_000])
+    await StatsRepository.rebuild(db, user_id)
+    await db.commit()
+
+
+async def legacy(db, user_id):
+    results = (await db.scalars(select(ExamResult).where(ExamResult.user_id == user_id))).all()
+    total = len(results)
+    return total, sum(r.score for r in results) / total, results[-10:]
+
+
+async def sql(db, user_id):
+    return await ResultRepository.summary(db, user_id), await ResultRepository.latest(db, user_id, 10)
+
+
+async def aggregate(db, user_id):
+    db.expire_all()
+    stats = await StatsRepository.get(db, user_id)
+    return stats.score_sum / stats.total_mocks, stats.recent[-10:]
+
+
+async def timed(fn, db, user_id):
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        await fn(db, user_id)
+        db.expunge_all()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    url = os.getenv("BENCH_DATABASE_URL") or f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        for table in (ExamResult.__table__, UserStats.__table__):
+            await conn.run_sync(lambda sync_conn, table=table: table.create(bind=sync_conn, checkfirst=True))
+    db = async_sessionmaker(bind=engine, expire_on_commit=False)()
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"{'results':>10} | {'legacy ms':>10} | {'sql ms':>10} | {'aggregate ms':>12}")
+    print("-" * 52)
+    for size in SIZES:
+        user_id = f"bench-{size}"
+        await seed(db, user_id, size)
+        print(
+            f"{size:>10} | {await timed(legacy, db, user_id):>10.2f} | "
+            f"{await timed(sql, db, user_id):>10.2f} | {await timed(aggregate, db, user_id):>12.2f}"
+        )
+    await db.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,2 @@
+from app.jobs.question_bank_job import run_question_bank_worker
+run_question_bank_worker()
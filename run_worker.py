@@ -4,5 +4,8 @@ import logging
 from app.db.session import SessionLocal
 from app.models.tasks import Task      # Import class
 from app.models.user import UserTable  # Import class
-from app.services.email_service import send_email
-run_reminders()
+from app.services.email_service import send_email, close_email_pool
+try:
+    run_reminders()
+finally:
+    close_email_pool()
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Settings are read at import time; give the app a throwaway SQLite database
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
@@ -0,0 +1,83 @@
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from app.services.email_service import SMTPConnectionPool, build_message
+
+
+class RecordingHandler:
+    """Keeps every delivered message with the client address it arrived from."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((session.peer, envelope.rcpt_tos))
+        return "250 OK"
+
+    @property
+    def connections(self):
+        return {peer for peer, _ in self.messages}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class LocalSMTPServer:
+    """aiosmtpd stand-in that can be restarted on the same port (dropping every open connection)."""
+
+    def __init__(self):
+        self.handler = RecordingHandler()
+        self.port = free_port()
+        self.controller = None
+
+    def start(self):
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=self.port)
+        self.controller.start()
+
+    def stop(self):
+        self.controller.stop()
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+
+@pytest.fixture
+def smtp_server():
+    server = LocalSMTPServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_pool(server, size=1):
+    return SMTPConnectionPool("127.0.0.1", server.port, use_tls=False, size=size, timeout=5)
+
+
+def test_messages_share_one_pooled_connection(smtp_server):
+    pool = make_pool(smtp_server)
+
+    for i in range(5):
+        pool.send(build_message(f"user{i}@example.com", "Reminder", "Task due soon"))
+    pool.close()
+
+    assert len(smtp_server.handler.messages) == 5
+    assert len(smtp_server.handler.connections) == 1
+
+
+def test_reconnects_after_server_drops_connection(smtp_server):
+    pool = make_pool(smtp_server)
+    pool.send(build_message("first@example.com", "Reminder", "Task due soon"))
+
+    # Restarting the server drops the idle pooled connection
+    smtp_server.restart()
+
+    pool.send(build_message("second@example.com", "Reminder", "Task due soon"))
+    pool.close()
+
+    handler = smtp_server.handler
+    assert [rcpts for _, rcpts in handler.messages] == [["first@example.com"], ["second@example.com"]]
+    assert len(handler.connections) == 2
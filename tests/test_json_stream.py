@@ -0,0 +1,88 @@
+import asyncio
+import json
+from app.services.json_stream import JsonArrayStreamParser, frame_questions, iter_json_objects
+
+QUESTIONS = [
+    {
+        "question": 'Which tag is "self-closing"? See {note} and [ref] \\ path',
+        "options": ["<br>", "a } b", "[ { ]", 'say \\"hi\\"'],
+        "answer": "<br>",
+        "explanation": "Ends with a backslash \\",
+    },
+    {"question": "2 + 2?", "options": ["3", "4", "5", "6"], "answer": "4", "explanation": ""},
+]
+TEXT = json.dumps(QUESTIONS, indent=2)
+
+
+def feed_chunks(chunks):
+    parser = JsonArrayStreamParser()
+    objects = []
+    for chunk in chunks:
+        objects.extend(parser.feed(chunk))
+    return objects, parser
+
+
+def test_every_split_point_yields_the_same_objects():
+    # Covers escapes, quotes and braces cut at any position between two chunks
+    for i in range(len(TEXT) + 1):
+        objects, parser = feed_chunks([TEXT[:i], TEXT[i:]])
+        assert objects == QUESTIONS, f"split at {i}: {TEXT[i - 5:i]!r}|{TEXT[i:i + 5]!r}"
+        assert parser.errors == 0
+
+
+def test_single_character_chunks():
+    objects, _ = feed_chunks(list(TEXT))
+    assert objects == QUESTIONS
+
+
+def test_backslash_at_end_of_chunk_escapes_the_next_quote():
+    objects, _ = feed_chunks(['[{"a": "x\\', '"}", "b": "{"}]'])
+    assert objects == [{"a": 'x"}', "b": "{"}]
+
+
+def test_objects_are_returned_by_the_chunk_that_closes_them():
+    parser = JsonArrayStreamParser()
+    first_end = TEXT.index("},") + 1
+    assert parser.feed(TEXT[:first_end - 1]) == []
+    assert parser.feed(TEXT[first_end - 1:first_end + 3]) == QUESTIONS[:1]
+    assert parser.feed(TEXT[first_end + 3:]) == QUESTIONS[1:]
+
+
+def test_markdown_fence_and_prose_are_ignored():
+    text = f"Here are your questions:\n```json\n{TEXT}\n```\nGood luck!"
+    objects, parser = feed_chunks([text[:20], text[20:60], text[60:]])
+    assert objects == QUESTIONS
+    assert parser.errors == 0
+
+
+def test_truncated_output_still_yields_completed_objects():
+    cut = TEXT.rindex('"answer"')
+    objects, _ = feed_chunks([TEXT[:cut]])
+    assert objects == QUESTIONS[:1]
+
+
+def test_malformed_object_is_counted_and_skipped():
+    objects, parser = feed_chunks(['[{"a": 1,}, {"b": 2}]'])
+    assert objects == [{"b": 2}]
+    assert parser.errors == 1
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+def test_iter_json_objects_across_chunks():
+    objects = asyncio.run(_collect(iter_json_objects(_chunks(TEXT[:33], TEXT[33:]))))
+    assert objects == QUESTIONS
+
+
+def test_frame_questions_drops_invalid_and_reports_count():
+    text = json.dumps([{"type": "MCQ", **QUESTIONS[1]}, {"type": "MCQ", "question": "No options"}])
+    frames = asyncio.run(_collect(frame_questions(_chunks(text), "sse")))
+    assert frames[0].startswith("event: question\n")
+    assert frames[-1] == 'event: done\ndata: {"count": 1, "rejected": 1}\n\n'
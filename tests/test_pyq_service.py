@@ -0,0 +1,105 @@
+import asyncio
+from app.services.pdf_service import QUESTION_MARKER, mark_question_starts
+from app.services.pyq_service import collect_question_window, iter_question_blocks, parse_question_block
+
+
+def marked_pages(*texts):
+    """Async page stream shaped like iter_pyq_pages, with global QIDX numbering."""
+    async def pages():
+        next_qidx = 1
+        for number, text in enumerate(texts, start=1):
+            marked = mark_question_starts(text, next_qidx)
+            next_qidx += marked.count(QUESTION_MARKER)
+            yield {"page": number, "text": text, "marked": marked}
+    return pages()
+
+
+def blocks_of(*texts):
+    async def collect():
+        return [block async for block in iter_question_blocks(marked_pages(*texts))]
+    return asyncio.run(collect())
+
+
+def parsed_questions(*texts):
+    return [parse_question_block(block)[0] for block in blocks_of(*texts)]
+
+
+STATEMENTS = """Q.1 Consider the following statements:
+1. The Ganga rises at Gangotri.
+2. The Yamuna joins it at Prayagraj.
+3. Both rivers are perennial.
+Which of the above are correct?
+(a) 1 only (b) 1 and 2 only (c) 2 and 3 only (d) 1, 2 and 3
+Ans: d
+Q.2 Capital of India?
+(a) Delhi (b) Mumbai (c) Kolkata (d) Chennai
+Ans: a
+"""
+
+
+def test_numbered_statements_stay_in_their_question():
+    # Statements 2 and 3 run past the question's own number (1) but still belong to it
+    blocks = blocks_of(STATEMENTS)
+
+    assert [(b["qidx"], b["label"]) for b in blocks] == [(1, 1), (2, 2)]
+    first, second = parsed_questions(STATEMENTS)
+    assert first["question"] == (
+        "Consider the following statements: 1. The Ganga rises at Gangotri. "
+        "2. The Yamuna joins it at Prayagraj. 3. Both rivers are perennial. "
+        "Which of the above are correct?"
+    )
+    assert first["answer"] == "1, 2 and 3"
+    assert second["question"] == "Capital of India?"
+
+
+def test_section_reset_after_lettered_options_starts_a_new_question():
+    text = """Q.5 Longest river?
+(a) Ganga (b) Yamuna (c) Godavari (d) Krishna
+Ans: a
+1. Capital of India?
+(a) Delhi (b) Mumbai (c) Kolkata (d) Chennai
+Ans: a
+"""
+    blocks = blocks_of(text)
+
+    assert [(b["qidx"], b["label"]) for b in blocks] == [(1, 5), (2, 1)]
+    assert [q["question"] for q in parsed_questions(text)] == ["Longest river?", "Capital of India?"]
+
+
+def test_section_reset_after_numeric_options_starts_a_new_question():
+    text = """Q.5 Longest river?
+(1) Ganga (2) Yamuna (3) Godavari (4) Krishna
+Ans: 1
+1. Capital of India?
+(a) Delhi (b) Mumbai (c) Kolkata (d) Chennai
+Ans: a
+2. Largest state?
+(a) Goa (b) Rajasthan (c) Kerala (d) Punjab
+Ans: b
+"""
+    blocks = blocks_of(text)
+
+    assert [(b["qidx"], b["label"]) for b in blocks] == [(1, 5), (2, 1), (3, 2)]
+    questions = parsed_questions(text)
+    assert [q["question"] for q in questions] == ["Longest river?", "Capital of India?", "Largest state?"]
+    assert questions[0]["answer"] == "Ganga"
+
+
+def test_question_continuing_on_the_next_page():
+    page_1 = "Q.1 Which river is longest?\n(a) Ganga (b) Yamuna\nc) Godavari"
+    page_2 = "d) Krishna\nAns: a\nQ.2 Capital of India?\n(a) Delhi (b) Mumbai (c) Kolkata (d) Chennai"
+
+    first, second = parsed_questions(page_1, page_2)
+
+    assert first["options"] == ["Ganga", "Yamuna", "Godavari", "Krishna"]
+    assert second["question"] == "Capital of India?"
+
+
+def test_window_counts_questions_not_statements():
+    async def collect():
+        return await collect_question_window(iter_question_blocks(marked_pages(STATEMENTS)), 2, 1)
+
+    window, labels = asyncio.run(collect())
+
+    assert labels == [1, 2]
+    assert [b["label"] for b in window] == [2]
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+import pytest
+from app.db.db import Base
+from app.db.session import SessionLocal, engine
+from app.jobs import reminder_job
+from app.models.tasks import Task
+from app.models.user import UserTable
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.create_all(engine)
+    reminder_job._send_failures.clear()
+    yield
+    Base.metadata.drop_all(engine)
+
+
+def add_tasks(email, count, due_in_minutes):
+    db = SessionLocal()
+    try:
+        user = UserTable(email=email, password="x")
+        db.add(user)
+        db.flush()
+        due = datetime.utcnow() + timedelta(minutes=due_in_minutes)
+        tasks = [Task(title=f"{email} {i}", user_id=user.id, due_date=due) for i in range(count)]
+        db.add_all(tasks)
+        db.commit()
+        return [task.id for task in tasks]
+    finally:
+        db.close()
+
+
+def reminded_ids():
+    db = SessionLocal()
+    try:
+        return {task.id for task in db.query(Task).filter(Task.reminder_sent == True)}
+    finally:
+        db.close()
+
+
+def test_unsendable_tasks_do_not_block_later_reminders(monkeypatch):
+    monkeypatch.setattr(reminder_job.settings, "REMINDER_BATCH_SIZE", 2)
+    sent_to = []
+
+    def fake_send_emails(messages):
+        errors = []
+        for to, _, _ in messages:
+            errors.append(OSError("mailbox unavailable") if to.startswith("broken") else None)
+            if not to.startswith("broken"):
+                sent_to.append(to)
+        return errors
+
+    monkeypatch.setattr(reminder_job, "send_emails", fake_send_emails)
+
+    # Earliest due: a user without an email, then a full batch that always fails
+    add_tasks("", 2, due_in_minutes=2)
+    failing = add_tasks("broken@example.com", 2, due_in_minutes=3)
+    ok = add_tasks("ok@example.com", 1, due_in_minutes=4)
+
+    # Round 1 claims the failing batch (never the email-less tasks) and backs it off
+    assert reminder_job.deliver_due_reminders() == 0
+    assert set(reminder_job.backed_off_ids(datetime.utcnow())) == set(failing)
+
+    # Round 2 claims past them
+    assert reminder_job.deliver_due_reminders() == 1
+    assert sent_to == ["ok@example.com"]
+    assert reminded_ids() == set(ok)
+
+
+def test_backoff_doubles_and_expires():
+    now = datetime.utcnow()
+    reminder_job.record_send_failure(1, now)
+    reminder_job.record_send_failure(1, now)
+
+    attempts, retry_at = reminder_job._send_failures[1]
+    assert attempts == 2
+    assert retry_at == now + timedelta(seconds=2 * reminder_job.settings.REMINDER_RETRY_SECONDS)
+    assert reminder_job.backed_off_ids(retry_at + timedelta(seconds=1)) == []
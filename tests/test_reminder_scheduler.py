@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.core.config import settings
+from app.db.db import Base
+from app.db.session import async_database_url, engine
+from app.jobs import reminder_job
+from app.jobs.reminder_job import ReminderScheduler
+from app.models.tasks import Task
+from app.models.user import UserTable
+from app.services.task_events import QueueTaskListener, local_task_events, notify_task_changed
+
+NOW = datetime(2030, 1, 1, 12, 0)
+WINDOW = timedelta(minutes=10)
+_user_numbers = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def database(monkeypatch):
+    monkeypatch.setattr(settings, "REMINDER_WINDOW_MINUTES", 10)
+    # Schedules everything due within the next 70 minutes
+    monkeypatch.setattr(settings, "REMINDER_RECONCILE_SECONDS", 3600)
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def listener():
+    while not local_task_events.empty():
+        local_task_events.get_nowait()
+    listener = QueueTaskListener()
+    yield listener
+    listener.close()
+
+
+@pytest.fixture
+def deliveries(monkeypatch):
+    """Counts claim-and-send passes instead of touching SMTP."""
+    calls = []
+    monkeypatch.setattr(reminder_job, "deliver_due_reminders", lambda: calls.append(1))
+    return calls
+
+
+def make_scheduler(listener):
+    scheduler = ReminderScheduler(listener)
+    # As if the reconciliation sweep just ran, so only the heap decides the next wake-up
+    scheduler._next_sweep = NOW + timedelta(hours=1)
+    return scheduler
+
+
+def change_tasks(change):
+    """Runs `change(db)` the way the API does: async session, notify, commit."""
+    async def run():
+        async_engine = create_async_engine(async_database_url(settings.DATABASE_URL))
+        try:
+            async with AsyncSession(async_engine) as db:
+                for task_id in await change(db):
+                    await notify_task_changed(db, task_id)
+                await db.commit()
+        finally:
+            await async_engine.dispose()
+    asyncio.run(run())
+
+
+def create_task(due_date):
+    created = []
+
+    async def change(db):
+        user = UserTable(email=f"user{next(_user_numbers)}@example.com", password="x")
+        db.add(user)
+        await db.flush()
+        task = Task(title="Revise", user_id=user.id, due_date=due_date)
+        db.add(task)
+        await db.flush()
+        created.append(task.id)
+        return [task.id]
+
+    change_tasks(change)
+    return created[0]
+
+
+def set_due_date(task_id, due_date):
+    async def change(db):
+        await db.execute(update(Task).where(Task.id == task_id).values(due_date=due_date))
+        return [task_id]
+    change_tasks(change)
+
+
+def delete_task(task_id):
+    async def change(db):
+        await db.execute(delete(Task).where(Task.id == task_id))
+        return [task_id]
+    change_tasks(change)
+
+
+def test_created_task_fires_at_its_reminder_time(listener, deliveries):
+    scheduler = make_scheduler(listener)
+    due = NOW + timedelta(minutes=30)
+    task_id = create_task(due)
+
+    scheduler.refresh(listener.poll(0), NOW)
+
+    assert listener.poll(0) == []
+    assert scheduler.seconds_until_next(NOW) == (due - WINDOW - NOW).total_seconds()
+    scheduler.fire_due(due - WINDOW - timedelta(seconds=1))
+    assert deliveries == []
+    scheduler.fire_due(due - WINDOW)
+    assert deliveries == [1]
+    # Popped for good: nothing left to fire
+    scheduler.fire_due(due)
+    assert deliveries == [1]
+
+
+def test_load_upcoming_orders_reminders_by_due_date(listener, deliveries):
+    scheduler = make_scheduler(listener)
+    later = create_task(NOW + timedelta(minutes=40))
+    sooner = create_task(NOW + timedelta(minutes=20))
+    create_task(NOW - timedelta(minutes=5))   # already past due
+    create_task(NOW + timedelta(minutes=90))  # left for a later sweep
+
+    scheduler.load_upcoming(NOW)
+
+    assert [task_id for _, task_id in sorted(scheduler._heap)] == [sooner, later]
+    scheduler.fire_due(NOW + timedelta(minutes=20) - WINDOW)
+    assert deliveries == [1]
+
+
+def test_updated_due_date_moves_the_reminder(listener, deliveries):
+    scheduler = make_scheduler(listener)
+    old_due = NOW + timedelta(minutes=20)
+    new_due = NOW + timedelta(minutes=50)
+    task_id = create_task(old_due)
+    scheduler.refresh(listener.poll(0), NOW)
+
+    set_due_date(task_id, new_due)
+    assert listener.poll(0) == [task_id]
+    scheduler.refresh([task_id], NOW)
+
+    # The old heap entry is stale and must not fire
+    scheduler.fire_due(old_due - WINDOW)
+    assert deliveries == []
+    assert scheduler.seconds_until_next(old_due - WINDOW) == (new_due - old_due).total_seconds()
+    scheduler.fire_due(new_due - WINDOW)
+    assert deliveries == [1]
+
+
+def test_deleted_task_never_fires(listener, deliveries):
+    scheduler = make_scheduler(listener)
+    due = NOW + timedelta(minutes=20)
+    task_id = create_task(due)
+    scheduler.refresh(listener.poll(0), NOW)
+
+    delete_task(task_id)
+    assert listener.poll(0) == [task_id]
+    scheduler.refresh([task_id], NOW)
+
+    scheduler.fire_due(due)
+    assert deliveries == []
+
+
+def test_events_are_not_queued_without_a_listener():
+    listener = QueueTaskListener()
+    listener.close()
+
+    create_task(NOW + timedelta(minutes=20))
+
+    assert local_task_events.empty()
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.core.config import settings
+from app.services import web_service
+from app.services.web_service import WebTextCache, close_web_client, extract_text_from_url
+
+
+def html_page(paragraphs: int) -> str:
+    return "<html><head><style>p {}</style></head><body>" + "".join(
+        f"<p>Paragraph {i} about rivers.</p>" for i in range(paragraphs)
+    ) + "</body></html>"
+
+
+PAGE = html_page(200)
+BIG_PAGE = html_page(20000)
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves PAGE with validators and answers matching conditional requests with 304."""
+
+    requests = []
+
+    def do_GET(self):
+        conditional = {h: self.headers[h] for h in ("If-None-Match", "If-Modified-Since") if self.headers[h]}
+        PageHandler.requests.append((self.path, conditional))
+
+        validators = {}
+        if self.path == "/etag":
+            validators = {"ETag": ETAG}
+        elif self.path == "/last-modified":
+            validators = {"Last-Modified": LAST_MODIFIED}
+
+        if conditional and (
+            conditional.get("If-None-Match") == ETAG or conditional.get("If-Modified-Since") == LAST_MODIFIED
+        ):
+            self.send_response(304)
+            for name, value in validators.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        body = (BIG_PAGE if self.path == "/big" else PAGE).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in validators.items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading early
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    PageHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(web_service, "web_cache", WebTextCache(16))
+    monkeypatch.setattr(settings, "WEB_FAST_HTML", False)
+    monkeypatch.setattr(settings, "WEB_TEXT_BUDGET", 12000)
+
+
+def fetch(*urls):
+    """Fetches each URL in turn on one event loop (the shared client is bound to it)."""
+    async def run():
+        try:
+            return [await extract_text_from_url(url) for url in urls]
+        finally:
+            await close_web_client()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path, header", [("/etag", "If-None-Match"), ("/last-modified", "If-Modified-Since")])
+def test_unchanged_page_is_revalidated_and_reused(base_url, path, header):
+    first, second = fetch(base_url + path, base_url + path)
+
+    assert first.startswith("Paragraph 0 about rivers.")
+    assert second == first
+    assert [list(conditional) for _, conditional in PageHandler.requests] == [[], [header]]
+
+
+def test_page_without_validators_is_not_cached(base_url):
+    fetch(base_url + "/plain", base_url + "/plain")
+
+    assert [conditional for _, conditional in PageHandler.requests] == [{}, {}]
+
+
+def test_download_stops_at_max_bytes(base_url, monkeypatch):
+    monkeypatch.setattr(settings, "WEB_MAX_BYTES", 4096)
+    monkeypatch.setattr(settings, "WEB_TEXT_BUDGET", 10 ** 6)
+
+    (text,) = fetch(base_url + "/big")
+
+    assert len(BIG_PAGE) > 100 * 4096
+    assert "Paragraph 0 about rivers." in text
+    assert "Paragraph 19999" not in text
+    assert len(text) < 4096
+
+
+def test_fast_html_stops_once_text_budget_is_full(base_url, monkeypatch):
+    monkeypatch.setattr(settings, "WEB_FAST_HTML", True)
+    monkeypatch.setattr(settings, "WEB_TEXT_BUDGET", 500)
+
+    fed = []
+    feed = web_service.BudgetTextParser.feed
+
+    def counting_feed(self, data):
+        fed.append(len(data))
+        return feed(self, data)
+
+    monkeypatch.setattr(web_service.BudgetTextParser, "feed", counting_feed)
+
+    (text,) = fetch(base_url + "/big")
+
+    assert text.startswith("Paragraph 0 about rivers.")
+    assert "p {}" not in text  # <style> contents are skipped
+    assert len(text) <= 500
+    # Only the first chunk(s) of a ~600 KB page were read and parsed
+    assert sum(fed) < len(BIG_PAGE) // 4